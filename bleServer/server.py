@@ -9,7 +9,7 @@
 #   - Persiste en **CSV** y **JSONL**.
 #   - Publica cada lectura en tiempo real a navegadores via **WebSocket (aiohttp)**.
 #   - Encola las lecturas y las envía a **Firebase Realtime Database** mediante
-#     un *worker* asíncrono que usa `requests` (bloqueante) sin frenar BLE.
+#     un *worker* asíncrono que ejecuta `requests` (bloqueante) en un hilo sin frenar BLE.
 #   - Permite cargar las credenciales de Firebase desde un **archivo JSON** de configuración.
 #
 #  Arquitectura:
@@ -100,8 +100,12 @@ async def firebase_worker() -> None:
         try:
             ts = obj.get("ts")
             data = obj.get("data", {})
+            #requests es bloqueante: el envío corre en un hilo (asyncio.to_thread) para que el
+            #round-trip HTTPS no detenga el loop (notificaciones BLE, WebSocket). Con un único
+            #worker solo hay un envío en curso; los siguientes esperan en la cola
             if all(k in data for k in ("temperature","bmp","spo2")): #si hay campos de medición normales 
-                firebase_sender.send_measurement(
+                await asyncio.to_thread(
+                    firebase_sender.send_measurement,
                     temperature=data.get("temperature",0.0),
                     bmp=data.get("bmp",0.0),
                     spo2=data.get("spo2",0.0),
@@ -110,7 +114,7 @@ async def firebase_worker() -> None:
                     timestamp_ms=ts,
                 )
             else:
-                firebase_sender.send_raw(obj, timestamp_ms=ts)
+                await asyncio.to_thread(firebase_sender.send_raw, obj, timestamp_ms=ts)
             backoff = 1.0
         except Exception as e:
             print(f"[FB] Error enviando a Firebase: {e}. Reintentando en {backoff:.1f}s")
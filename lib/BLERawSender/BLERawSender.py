@@ -3,9 +3,20 @@
 #
 # Cambios v1.0.4: divide advertising en ADV (flags+UUID) y SCAN RESPONSE (nombre),
 #                 arreglando descubrimiento cuando el payload supera 31 bytes.
+# Cambios v1.0.5: envío agrupado (queue_measurement / queue_raw + flush): varias líneas
+#                 JSON comparten notificaciones en lugar de una transmisión por mensaje.
+#                 TX sin retardo fijo por fragmento: solo se espera y reintenta cuando el
+#                 stack rechaza la notificación (buffers llenos).
+#                 La cola es un único bytearray reutilizado: cada línea se copia en él y
+#                 `flush` envía un memoryview, sin lista de líneas ni `join` por envío.
+#                 Nota: los parámetros de conexión (intervalo, latencia, timeout) no se pueden
+#                 fijar desde este firmware: `bluetooth.BLE` de MicroPython no ofrece al
+#                 periférico ninguna petición de actualización; los decide la central.
+#                 Las mediciones se serializan con una plantilla de texto (mismo JSON) en
+#                 lugar de construir diccionarios y pasar por `json.dumps`.
 #
 # @author   Alejandro Fernández Rodríguez, Irene Gallardo Sierra
-# @version  1.0.4
+# @version  1.0.5
 # @date     2025-08-02
 # @copyright Copyright (c) 2025
 # @license  MIT — Consulte el archivo LICENSE para más información.
@@ -59,6 +70,11 @@ _FLAG_WRITE = bt.FLAG_WRITE
 _FLAG_WRITE_NO_RESPONSE = bt.FLAG_WRITE_NO_RESPONSE
 _FLAG_NOTIFY = bt.FLAG_NOTIFY
 
+# --- Control de flujo en TX ---
+_TX_RETRY_MS     = 2   # espera antes de reintentar un fragmento rechazado (buffers del stack llenos)
+_TX_MAX_RETRIES  = 50  # reintentos seguidos del mismo fragmento (~100 ms) antes de propagar el error
+_TX_QUEUE_BYTES  = 512 # capacidad inicial de la cola de `flush` (crece si alguna vez no basta)
+
 
 def _adv_payload(flags=True, services=None): # publicidad BLE
     r""" #la r indica que es una cadena de texto “raw” o cruda
@@ -213,14 +229,29 @@ class _BLEUART:
         @brief Envía bytes por la característica TX (NOTIFY), fragmentando por MTU.
         @param data_bytes Búfer `bytes`/`bytearray` con los datos a enviar.
         @exception RuntimeError Si no hay una central conectada.
-        @note Inserta un retardo corto entre fragmentos para evitar congestión.
+        @exception OSError Si el stack sigue rechazando un fragmento tras `_TX_MAX_RETRIES` reintentos.
+        @note Sin retardo fijo entre fragmentos: solo se espera cuando el stack rechaza una
+              notificación por falta de buffers (ENOMEM) y se reintenta el mismo fragmento,
+              de modo que no se pierde ninguno.
         """
         if not self.is_connected():
             raise RuntimeError("No hay central BLE conectado.")
         chunk = self.max_payload() # Calcula el tamaño máximo de cada fragmento
-        for i in range(0, len(data_bytes), chunk): # Recorre los datos en bloques.
-            self._ble.gatts_notify(self._conn_handle, self._tx_handle, data_bytes[i:i+chunk]) # Fragmento que se envía
-            time.sleep_ms(5) # Evita la pérdida de fragmentos
+        mv = memoryview(data_bytes) # Fragmentos sin copiar los datos
+        n = len(mv)
+        i = 0
+        retries = 0
+        while i < n: # Recorre los datos en bloques.
+            try:
+                self._ble.gatts_notify(self._conn_handle, self._tx_handle, mv[i:i+chunk]) # Fragmento que se envía
+            except OSError:
+                if not self.is_connected() or retries >= _TX_MAX_RETRIES:
+                    raise
+                retries += 1
+                time.sleep_ms(_TX_RETRY_MS) # Da tiempo a que el stack libere buffers
+                continue
+            retries = 0
+            i += chunk
 
     # ---- Advertising ----
 
@@ -269,6 +300,8 @@ class BLERawSender:
           - Enviar cualquier estructura (dict/list/valor) con sello temporal.
         Cada envío se serializa como una línea JSON terminada en '\n':
         `{"ts": <timestamp_ms>, "data": <payload>}\n`
+        Con `queue_measurement`/`queue_raw` + `flush` varias líneas se agrupan en una sola
+        transmisión (comparten notificaciones ATT hasta MTU-3 bytes).
     """
 
     def __init__(self, device_name="ESP32-BLERaw", auto_wait_ms=0):
@@ -280,6 +313,9 @@ class BLERawSender:
         @note Si no se conecta nadie en `auto_wait_ms`, continúa anunciando sin error.
         """
         self._uart = _BLEUART(name=device_name)
+        self._queue = bytearray(_TX_QUEUE_BYTES) # líneas JSON pendientes de `flush`, seguidas
+        self._queue_len = 0   # bytes ocupados en `_queue`
+        self._queue_lines = 0 # líneas encoladas
         if auto_wait_ms and not self._uart.wait_for_connection(timeout_ms=auto_wait_ms):
             print("⚠ No se conectó ningún central en el timeout; sigo anunciando.")
 
@@ -310,14 +346,9 @@ class BLERawSender:
         @exception RuntimeError Si no hay una central BLE conectada.
         @post Envía una línea JSON terminada en '\n' vía característica TX (notify).
         """
-        payload = { # Crea un diccionario con los datos de la medición
-            "temperature": round(float(temperature), 2),
-            "bmp": round(float(bmp), 2),
-            "spo2": round(float(spo2), 2),
-            "modelPreccision": round(float(modelPreccision), 2),
-            "riskScore": round(float(riskScore), 2),
-        }
-        self.send_raw(payload, timestamp_ms)
+        if not self._uart.is_connected():
+            raise RuntimeError("No hay central BLE conectado. Conéctate desde el ordenador antes de enviar.")
+        self._uart.send(_measurement_bytes(temperature, bmp, spo2, modelPreccision, riskScore, timestamp_ms) + b"\n")
 
     def send_raw(self, data, timestamp_ms=None):
         r"""
@@ -331,12 +362,105 @@ class BLERawSender:
             `{"ts": <timestamp_ms>, "data": <data>}\n`
             y lo envía fragmentado según MTU por notificaciones ATT.
         """
-        if timestamp_ms is None:
-            try:
-                timestamp_ms = int(time.time() * 1000) # Se multiplica por 1000 para convertirlo a milisegundos
-            except Exception:
-                timestamp_ms = time.ticks_ms() # Utiliza el número de milisegundos transcurridos desde que arrancó el ESP32
         if not self._uart.is_connected():
             raise RuntimeError("No hay central BLE conectado. Conéctate desde el ordenador antes de enviar.")
-        line = json.dumps({"ts": timestamp_ms, "data": data}) + "\n"
-        self._uart.send(line.encode("utf-8")) # Lo convierte en bytes, que es el formato que necesita Bluetooth
\ No newline at end of file
+        self._uart.send(_json_line(data, timestamp_ms))
+
+    # ---- Envío agrupado ----
+
+    def queue_measurement(self, temperature, bmp, spo2, modelPreccision=0.0, riskScore=0.0, timestamp_ms=None):
+        r"""
+        @brief Encola una medición (mismos campos que `send_measurement`) para el próximo `flush`.
+        @post El sello temporal se toma ahora, no al enviar.
+        """
+        self._enqueue(_measurement_bytes(temperature, bmp, spo2, modelPreccision, riskScore, timestamp_ms))
+
+    def queue_raw(self, data, timestamp_ms=None):
+        r"""
+        @brief Encola un payload arbitrario (como `send_raw`) para el próximo `flush`.
+        @exception ValueError Si `data` no es serializable a JSON.
+        """
+        self._enqueue(_json_bytes(data, timestamp_ms))
+
+    def _enqueue(self, line):
+        r"""
+        @brief Copia una línea JSON (sin '\n') al final de la cola y añade el separador.
+        """
+        q = self._queue
+        n = self._queue_len
+        end = n + len(line) + 1
+        if end > len(q):
+            q.extend(bytes(end - len(q))) # solo crece; el espacio se reutiliza en los siguientes envíos
+        q[n:end - 1] = line
+        q[end - 1] = 0x0A # '\n'
+        self._queue_len = end
+        self._queue_lines += 1
+
+    def pending(self):
+        r"""
+        @brief Número de líneas encoladas pendientes de envío.
+        """
+        return self._queue_lines
+
+    def flush(self):
+        r"""
+        @brief Envía todas las líneas encoladas en una sola transmisión.
+        @return Número de líneas enviadas.
+        @exception RuntimeError Si no hay una central BLE conectada (las líneas se descartan).
+        @details
+            Las líneas se concatenan y se fragmentan por MTU: varias mediciones comparten
+            notificaciones ATT en lugar de abrir al menos una por mensaje. El receptor
+            separa por '\n' igual que con `send_raw`.
+        """
+        lines = self._queue_lines
+        if not lines:
+            return 0
+        n = self._queue_len
+        self._queue_len = self._queue_lines = 0
+        if not self._uart.is_connected():
+            raise RuntimeError("No hay central BLE conectado. Conéctate desde el ordenador antes de enviar.")
+        self._uart.send(memoryview(self._queue)[:n]) # gatts_notify copia cada fragmento: el búfer queda libre al volver
+        return lines
+
+
+# Plantilla de una medición ya serializada: mismo JSON que `_json_bytes` con el diccionario
+# de `send_measurement`, pero con un solo formateo en vez de dos diccionarios y `json.dumps`
+_MEASUREMENT_FMT = ('{"ts":%d,"data":{"temperature":%.2f,"bmp":%.2f,"spo2":%.2f,'
+                    '"modelPreccision":%.2f,"riskScore":%.2f}}')
+
+
+def _measurement_bytes(temperature, bmp, spo2, modelPreccision, riskScore, timestamp_ms=None):
+    r"""
+    @brief Línea JSON (sin '\n') de una medición con campos normalizados a 2 decimales.
+    @param timestamp_ms Marca temporal en milisegundos; si `None`, se obtiene de `time`.
+    @note `%.2f` ya convierte enteros (spo2/bpm/riskScore llegan como int): sin `float()` previo.
+    """
+    return (_MEASUREMENT_FMT % (_timestamp_ms(timestamp_ms), temperature, bmp, spo2,
+                                modelPreccision, riskScore)).encode("utf-8")
+
+
+def _timestamp_ms(timestamp_ms=None):
+    r"""
+    @brief Devuelve `timestamp_ms` o, si es `None`, la hora actual en milisegundos.
+    """
+    if timestamp_ms is None:
+        try:
+            timestamp_ms = int(time.time() * 1000) # Se multiplica por 1000 para convertirlo a milisegundos
+        except Exception:
+            timestamp_ms = time.ticks_ms() # Utiliza el número de milisegundos transcurridos desde que arrancó el ESP32
+    return timestamp_ms
+
+
+def _json_bytes(data, timestamp_ms=None):
+    r"""
+    @brief Serializa `{"ts": <timestamp_ms>, "data": <data>}` en bytes UTF-8 (sin '\n').
+    @param timestamp_ms Marca temporal en milisegundos; si `None`, se obtiene de `time`.
+    """
+    return json.dumps({"ts": _timestamp_ms(timestamp_ms), "data": data}).encode("utf-8") # Lo convierte en bytes, que es el formato que necesita Bluetooth
+
+
+def _json_line(data, timestamp_ms=None):
+    r"""
+    @brief Serializa `{"ts": <timestamp_ms>, "data": <data>}\n` en bytes UTF-8.
+    """
+    return _json_bytes(data, timestamp_ms) + b"\n"
\ No newline at end of file
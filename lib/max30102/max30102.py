@@ -33,7 +33,9 @@
 #  ---------------------------------------------------------------------------
 
 import time
-from machine import I2C, Pin
+import micropython
+from array import array
+from machine import I2C, Pin, idle
 
 # ============================ Dirección base I²C ============================
 MAX30105_ADDRESS = 0x57
@@ -146,6 +148,13 @@ SLOT_IR_PILOT    = 0x06
 SLOT_GREEN_PILOT = 0x07
 
 STORAGE_SIZE = 32        # FIFO size
+
+# Registros de configuración que sólo cambian cuando se escriben desde el host
+# (los punteros FIFO, estados de interrupción y temperatura los modifica el chip)
+_CACHEABLE_REGS = (MAX30105_INTENABLE1, MAX30105_INTENABLE2, MAX30105_FIFOCONFIG,
+                   MAX30105_MODECONFIG, MAX30105_PARTICLECONFIG, MAX30105_LED1_PULSEAMP,
+                   MAX30105_LED2_PULSEAMP, MAX30105_LED3_PULSEAMP, MAX30105_LED_PROX_AMP,
+                   MAX30105_MULTILEDCONFIG1, MAX30105_MULTILEDCONFIG2, MAX30105_PROXINTTHRESH)
 #  @class MAX30102
 #  @brief Clase que permite el manejo del sensor óptico MAX30102.
 #
@@ -160,13 +169,25 @@ class MAX30105:
         self.addr = addr                    #: Dirección I2C del sensor.
         self.revisionID = 0                 #: ID de revisión del chip.
         self.activeLEDs = 0                 #: Número de LEDs activos configurados.
+        self._sample_size = 0               #: Bytes por muestra completa (``activeLEDs``×3).
+        self._chunk_size = 0                #: Mayor ráfaga ≤32 bytes alineada a ``_sample_size``.
+        self._reg_cache = {}                #: Último valor escrito en cada registro de ``_CACHEABLE_REGS``.
 
         # Buffers circulares para los datos de los LEDs
         self.head = 0                      #: Índice de escritura del buffer circular.
         self.tail = 0                      #: Índice de lectura del buffer circular.
-        self.red   = [0]*STORAGE_SIZE              #: Almacena las muestras del LED rojo.
-        self.IR    = [0]*STORAGE_SIZE              #: Almacena las muestras del LED infrarrojo.
-        self.green = [0]*STORAGE_SIZE              #: Almacena las muestras del LED verde.
+        self.red   = array('i', [0]*STORAGE_SIZE)  #: Almacena las muestras del LED rojo.
+        self.IR    = array('i', [0]*STORAGE_SIZE)  #: Almacena las muestras del LED infrarrojo.
+        self.green = array('i', [0]*STORAGE_SIZE)  #: Almacena las muestras del LED verde.
+
+        # Búfer de lectura I²C reutilizado en cada ráfaga (sin asignaciones por lectura)
+        self._buf = bytearray(32)          #: Búfer de ráfaga del FIFO (32 bytes máx. por lectura).
+        self._mv  = memoryview(self._buf)  #: Vista sin copia sobre ``self._buf``.
+        self._ptr = bytearray(3)           #: Punteros WR / OVF / RD leídos en una sola transacción.
+        self._temp = bytearray(2)          #: Parte entera y fraccionaria de la temperatura.
+        self._temp_pending = False         #: Conversión lanzada con ``startTemperature`` sin recoger.
+        self._int_pin = None               #: Pin INT con A_FULL (:pyfunc:`enableDataInterrupt`).
+        self._rdy_pin = None               #: Pin INT con PPG_RDY para :pyfunc:`safeCheck` (``None``: se sondea el FIFO por I²C).
 
     #  @brief Inicializa el sensor MAX30102.
     #
@@ -203,9 +224,12 @@ class MAX30105:
     def writeRegister(self, reg, val):
         try:
             self.i2c.writeto_mem(self.addr, reg, bytes([val]))
-            return True
         except:
+            self._reg_cache.pop(reg, None)
             return False
+        if reg in _CACHEABLE_REGS:
+            self._reg_cache[reg] = val
+        return True
 
     #  @brief Modifica determinados bits de un registro usando una máscara.
     #
@@ -214,10 +238,16 @@ class MAX30105:
     #  @param reg Dirección del registro a modificar.
     #  @param mask Máscara AND para limpiar los bits deseados.
     #  @param thing Valor OR para establecer los bits deseados.
+    #  @note Si el registro está en la caché de escrituras se evita la lectura I²C,
+    #        y si el valor resultante coincide con el actual tampoco se escribe.
     def bitMask(self, reg, mask, thing):
-        orig = self.readRegister(reg)
-        orig &= mask
-        self.writeRegister(reg, orig | thing)
+        orig = self._reg_cache.get(reg)
+        if orig is None:
+            orig = self.readRegister(reg)
+        new = (orig & mask) | thing
+        if new == orig and reg in self._reg_cache:
+            return
+        self.writeRegister(reg, new)
 
     ## @brief Lee el valor actual del registro de estado de interrupciones INT1.
     #  @return Valor del registro MAX30102_INTSTAT1.
@@ -272,12 +302,17 @@ class MAX30105:
     #        volver a llamar a :pymeth:`setup` o reconfigurar los registros.
     #  @note Se introduce un retardo de 1 ms entre sondeos.
     def softReset(self):
+        # Referencias locales: evitan la búsqueda en el módulo `time` en cada sondeo
+        ticks_ms = time.ticks_ms; ticks_diff = time.ticks_diff; sleep_ms = time.sleep_ms
+        readRegister = self.readRegister
         self.bitMask(MAX30105_MODECONFIG, MAX30105_RESET_MASK, MAX30105_RESET)
-        start = time.ticks_ms()
-        while time.ticks_diff(time.ticks_ms(), start) < 100:
-            if (self.readRegister(MAX30105_MODECONFIG) & MAX30105_RESET)==0:
+        start = ticks_ms()
+        while ticks_diff(ticks_ms(), start) < 100:
+            if (readRegister(MAX30105_MODECONFIG) & MAX30105_RESET)==0:
                 break
-            time.sleep_ms(1)
+            sleep_ms(1)
+        # El reset devuelve todos los registros a sus valores por defecto
+        self._reg_cache.clear()
 
     #  @brief Coloca al sensor en modo de *shutdown* de bajo consumo.
     #
@@ -402,16 +437,38 @@ class MAX30105:
     #  @brief Lee la temperatura interna del chip (°C).
     #  @return Temperatura en °C con resolución de 0.0625 °C.
     def readTemperature(self):
+        ticks_ms = time.ticks_ms; ticks_diff = time.ticks_diff; sleep_ms = time.sleep_ms
+        readRegister = self.readRegister
         self.writeRegister(MAX30105_DIETEMPCONFIG, 0x01)
-        start = time.ticks_ms()
-        while time.ticks_diff(time.ticks_ms(), start)<100:
-            if self.readRegister(MAX30105_INTSTAT2) & MAX30105_INT_DIE_TEMP_RDY_ENABLE:
+        start = ticks_ms()
+        while ticks_diff(ticks_ms(), start)<100:
+            if readRegister(MAX30105_INTSTAT2) & MAX30105_INT_DIE_TEMP_RDY_ENABLE:
                 break
-            time.sleep_ms(1)
-        t_int  = self.readRegister(MAX30105_DIETEMPINT)
-        t_frac = self.readRegister(MAX30105_DIETEMPFRAC)
+            sleep_ms(1)
+        t_int  = readRegister(MAX30105_DIETEMPINT)
+        t_frac = readRegister(MAX30105_DIETEMPFRAC)
         return t_int + (t_frac * 0.0625)
 
+    #  @brief Lanza una conversión de temperatura sin esperar a que termine (~30 ms).
+    #  @see readTemperatureResult
+    def startTemperature(self):
+        self._temp_pending = self.writeRegister(MAX30105_DIETEMPCONFIG, 0x01)
+
+    #  @brief Recoge la conversión lanzada con ``startTemperature`` sin bloquear.
+    #  @return Temperatura en °C, o ``None`` si no hay conversión lanzada o aún no ha terminado.
+    #  @note TEMP_EN (bit 0 de DIETEMPCONFIG) se borra solo al terminar la conversión; la
+    #        parte entera y la fraccionaria (0x1F y 0x20) se leen en una única transacción.
+    def readTemperatureResult(self):
+        if not self._temp_pending or self.readRegister(MAX30105_DIETEMPCONFIG) & 0x01:
+            return None
+        t = self._temp
+        try:
+            self.i2c.readfrom_mem_into(self.addr, MAX30105_DIETEMPINT, t)
+        except OSError:
+            return None
+        self._temp_pending = False
+        return t[0] + (t[1] * 0.0625)
+
     ## @brief Lee la temperatura interna en grados Fahrenheit.
     def readTemperatureF(self):
         t = self.readTemperature()
@@ -470,6 +527,8 @@ class MAX30105:
         modes = {1:MAX30105_MODE_REDONLY,2:MAX30105_MODE_REDIRONLY,3:MAX30105_MODE_MULTILED}
         self.setLEDMode(modes.get(ledMode, MAX30105_MODE_REDONLY))
         self.activeLEDs = ledMode
+        self._sample_size = ledMode * 3
+        self._chunk_size = (32 // self._sample_size) * self._sample_size
         # ADC range
         if   adcRange<4096:   self.setADCRange(MAX30105_ADCRANGE_2048)
         elif adcRange<8192:   self.setADCRange(MAX30105_ADCRANGE_4096)
@@ -579,59 +638,49 @@ class MAX30105:
     #  @note El método intenta leer en bloques de hasta 32 bytes y siempre
     #        alinea la longitud al múltiplo de *LEDs*×3 bytes necesario para
     #        formar muestras completas.
+    @micropython.native
     def check(self):
-        readPtr  = self.getReadPointer()
-        writePtr = self.getWritePointer()
+        # FIFO_WR_PTR (0x04), OVF_COUNTER (0x05) y FIFO_RD_PTR (0x06) son contiguos:
+        # una sola transacción I²C en lugar de una por puntero
+        ptr = self._ptr
+        try:
+            self.i2c.readfrom_mem_into(self.addr, MAX30105_FIFOWRITEPTR, ptr)
+        except OSError:
+            return 0  # Error en I2C
+        writePtr = ptr[0]
+        readPtr  = ptr[2]
         if readPtr == writePtr:
             return 0
         num = writePtr - readPtr
         if num < 0: num += STORAGE_SIZE
-        to_read = num * self.activeLEDs * 3
+        to_read = num * self._sample_size
 
-        # burst read
+        # burst read (ráfagas alineadas a muestras completas)
         while to_read > 0:
-            chunk = min(to_read, 32)
-            # align chunk to multiple of leds*3
-            mod = chunk % (self.activeLEDs*3)
-            if mod: 
-                chunk -= mod
-                if chunk == 0:  # no hay suficientes datos para leer
-                    break
+            chunk = min(to_read, self._chunk_size)
+            buf = self._mv[:chunk]
             try:
-                buf = self.i2c.readfrom_mem(self.addr, MAX30105_FIFODATA, chunk)
+                self.i2c.readfrom_mem_into(self.addr, MAX30105_FIFODATA, buf)
             except OSError:
                 return 0  # Error en I2C
 
             i = 0
-            while i < len(buf):
-                # Verificar que tenemos suficientes bytes para al menos una muestra
-                if i + 3 > len(buf):
-                    break
-                    
+            while i < chunk:
                 self.head = (self.head + 1) % STORAGE_SIZE
                 
-                # Leer valor RED (siempre presente)
-                val = (buf[i] << 16) | (buf[i+1] << 8) | buf[i+2]
-                val &= 0x3FFFF
-                self.red[self.head] = val
+                # Leer valor RED (siempre presente), 3 bytes big-endian de 18 bits útiles
+                # (desplazamientos sobre el búfer: sin slice ni int.from_bytes por valor)
+                self.red[self.head] = ((buf[i] << 16) | (buf[i+1] << 8) | buf[i+2]) & 0x3FFFF
                 i += 3
                 
                 # Leer valor IR (si hay más de 1 LED activo)
                 if self.activeLEDs > 1:
-                    if i + 3 > len(buf):
-                        break
-                    val = (buf[i] << 16) | (buf[i+1] << 8) | buf[i+2]
-                    val &= 0x3FFFF
-                    self.IR[self.head] = val
+                    self.IR[self.head] = ((buf[i] << 16) | (buf[i+1] << 8) | buf[i+2]) & 0x3FFFF
                     i += 3
                 
                 # Leer valor GREEN (si hay más de 2 LEDs activos)
                 if self.activeLEDs > 2:
-                    if i + 3 > len(buf):
-                        break
-                    val = (buf[i] << 16) | (buf[i+1] << 8) | buf[i+2]
-                    val &= 0x3FFFF
-                    self.green[self.head] = val
+                    self.green[self.head] = ((buf[i] << 16) | (buf[i+1] << 8) | buf[i+2]) & 0x3FFFF
                     i += 3
             
             to_read -= chunk
@@ -643,14 +692,89 @@ class MAX30105:
     #  ``max_ms``. Esto permite al usuario bloquear la ejecución hasta que el
     #  sensor disponga de una nueva conversión completa.
     #  
+    #  Si hay pin de dato listo (:pyfunc:`attachDataReadyPin`) no se sondea el bus:
+    #  se cede la CPU con ``machine.idle()`` mientras INT (activo a nivel bajo) siga
+    #  en reposo y solo se lee el FIFO cuando se activa. Antes de dar por expirado
+    #  el plazo se lee el FIFO una última vez, por si INT no llegó a activarse.
+    #  El pin de :pyfunc:`enableDataInterrupt` (A_FULL) no se usa aquí: con él INT
+    #  solo se activa con el FIFO casi lleno y habría muestras sin leer.
+    #  
     #  @param max_ms Tiempo máximo de espera en milisegundos.
     #  @retval True  si se recibieron datos dentro del tiempo.
     #  @retval False si expiró ``max_ms`` sin novedades.
     def safeCheck(self, max_ms):
-        start = time.ticks_ms()
+        ticks_ms = time.ticks_ms; ticks_diff = time.ticks_diff; sleep_ms = time.sleep_ms
+        check = self.check
+        pin = self._rdy_pin
+        start = ticks_ms()
         while True:
-            if time.ticks_diff(time.ticks_ms(), start) > max_ms:
-                return False
-            if self.check():
+            if ticks_diff(ticks_ms(), start) > max_ms:
+                return pin is not None and bool(check())
+            if pin is None:
+                if check():
+                    return True
+                sleep_ms(1)
+            elif pin.value():
+                idle()
+            elif check():
                 return True
-            time.sleep_ms(1)
\ No newline at end of file
+            else:
+                self.getINT1()  # INT activo sin muestras nuevas: se borra el estado
+    # ---------------------------------------------------------------------
+    # >> Adquisición guiada por interrupción (A_FULL)
+    # ---------------------------------------------------------------------
+
+    #  @brief Conecta el pin INT del sensor para despertar a :pyfunc:`safeCheckAsync`.
+    #  
+    #  Programa el umbral *casi‑lleno* del FIFO, habilita la interrupción A_FULL
+    #  y registra un manejador sobre el flanco de bajada del pin INT (activo a
+    #  nivel bajo). El manejador sólo activa un ``uasyncio.ThreadSafeFlag``, que
+    #  es seguro de usar desde contexto de interrupción.
+    #  
+    #  @param int_pin    Número de GPIO conectado al pin INT del MAX30102.
+    #  @param almostFull Muestras libres restantes al disparar (0–15); con 15 la
+    #                    interrupción salta cada 17 muestras.
+    #  @note La interrupción se borra al leer ``MAX30105_FIFODATA``, lo que ya
+    #        hace :pyfunc:`check`.
+    def enableDataInterrupt(self, int_pin, almostFull=15):
+        import uasyncio
+        self._data_flag = uasyncio.ThreadSafeFlag()
+        self._int_pin = Pin(int_pin, Pin.IN, Pin.PULL_UP)
+        self._int_pin.irq(trigger=Pin.IRQ_FALLING, handler=self._on_data_irq)
+        self.setFIFOAlmostFull(almostFull)
+        self.enableAFULL()
+        self.getINT1()  # descarta un estado A_FULL previo
+
+    #  @brief Conecta el pin INT del sensor para que :pyfunc:`safeCheck` espere sin sondear el bus.
+    #  
+    #  Habilita la interrupción PPG_RDY (una por muestra nueva, sin la latencia de
+    #  esperar a que el FIFO esté casi lleno) y configura el pin como entrada con
+    #  pull-up; :pyfunc:`safeCheck` consulta su nivel en vez de leer los punteros
+    #  del FIFO por I²C en cada milisegundo.
+    #  
+    #  @param int_pin Número de GPIO conectado al pin INT del MAX30102.
+    #  @note Llamar después de :pyfunc:`setup` (el *soft reset* borra la
+    #        configuración de interrupciones). PPG_RDY se borra al leer
+    #        ``MAX30105_FIFODATA``, lo que ya hace :pyfunc:`check`.
+    def attachDataReadyPin(self, int_pin):
+        self._rdy_pin = Pin(int_pin, Pin.IN, Pin.PULL_UP)
+        self.enableDATARDY()
+        self.getINT1()  # descarta un estado previo
+
+    ## @brief Manejador de la interrupción INT: sólo señaliza la tarea en espera.
+    def _on_data_irq(self, pin):
+        self._data_flag.set()
+
+    #  @brief Variante asíncrona de :pyfunc:`safeCheck` sin sondeo del bus I²C.
+    #  
+    #  Vacía el FIFO si ya hay datos; en caso contrario cede el control al
+    #  planificador hasta que el sensor dispare la interrupción A_FULL.
+    #  Requiere haber llamado antes a :pyfunc:`enableDataInterrupt`.
+    #  
+    #  @return Número de muestras leídas del FIFO (siempre > 0).
+    async def safeCheckAsync(self):
+        n = self.check()
+        while not n:
+            await self._data_flag.wait()
+            n = self.check()
+        return n
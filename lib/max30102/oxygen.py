@@ -33,6 +33,8 @@
 #  @endcode
 #  ---------------------------------------------------------------------------
 
+import micropython
+
 #  @class OxygenSaturation
 #  @brief Clase para calcular la saturación de oxygeno en sangre a partir de los datos del sensor MAX30102.
 #
@@ -63,11 +65,18 @@ class OxygenSaturation:
         self.FreqS = int(sample_rate_hz)
         self.BUFFER_SIZE = self.FreqS * 2 # 2 s de señal
         self.MA4_SIZE = max(4, int(round(self.FreqS * 0.04))) # media móvil de unos 40 ms
-        pass
-
-    def _mean(self, arr):
-        return sum(arr) / len(arr) if arr else 0 # para evitar una división entre cero
-
+        self._HR_NUM = self.FreqS * 60 # muestras por minuto: numerador entero de bpm = _HR_NUM / intervalo
+
+    @micropython.native
+    def _imean(self, arr):
+        # media entera en una sola pasada: evita crear objetos float en el heap
+        n = len(arr)
+        s = 0
+        for v in arr:
+            s += v
+        return s // n if n else 0 # para evitar una división entre cero
+
+    @micropython.native
     def _max(self, arr):
         max_val = arr[0]
         max_idx = 0
@@ -82,13 +91,14 @@ class OxygenSaturation:
     # ------------------------------------------------------------------
     ## @brief Calcula SpO2 (%) y ritmo cardiaco (bpm).
     #  
-    #  @param ir_buffer  Lista con muestras de infrarrojo (enteros sin signo).
-    #  @param red_buffer Lista con muestras de rojo.
+    #  @param ir_buffer  Lista o ``array('i')`` con muestras de infrarrojo (enteros sin signo).
+    #  @param red_buffer Lista o ``array('i')`` con muestras de rojo. No se modifican.
     #  @return Tupla ``(spo2, spo2_valid, heart_rate, hr_valid)`` donde:
     #          - *spo2*      Saturación estimada 0‑100 %.  ``-999`` si inválido.
     #          - *spo2_valid* ``1`` si la estimación es válida, ``0`` si no.
     #          - *heart_rate* Frecuencia cardiaca (bpm). ``-999`` si inválida.
     #          - *hr_valid*  ``1`` si *heart_rate* es válida.
+    @micropython.native
     def calculate_spo2_and_heart_rate(self, ir_buffer, red_buffer):
         """Algoritmo completo descrito en AN‑6595; implementa:
         1. Eliminación de componente DC e inversión de señal IR.
@@ -102,17 +112,26 @@ class OxygenSaturation:
             return -999, 0, -999, 0
 
         # 1. Calcula la media DC y elimina DC de IR, invierte señal
-        un_ir_mean = self._mean(ir_buffer)
+        un_ir_mean = self._imean(ir_buffer)
         an_x = [-1 * (val - un_ir_mean) for val in ir_buffer]
 
         # 2. Media móvil de 4 puntos - CORRECCIÓN: usar longitud real del buffer
-        an_x_ma4 = an_x.copy()
+        # (in situ: la posición k sólo depende de k..k+MA4_SIZE-1, aún sin sobrescribir)
+        # Suma deslizante: al avanzar la ventana se suma la muestra que entra y se resta la
+        # que sale, sin crear un slice por posición (mismo resultado entero)
+        an_x_ma4 = an_x
         buffer_length = len(an_x)
-        for k in range(buffer_length - self.MA4_SIZE):
-            an_x_ma4[k] = sum(an_x[k:k+self.MA4_SIZE]) // self.MA4_SIZE
+        ma4 = self.MA4_SIZE
+        acc = 0
+        for k in range(min(ma4, buffer_length)):
+            acc += an_x[k]
+        for k in range(buffer_length - ma4):
+            old = an_x[k]
+            an_x_ma4[k] = acc // ma4
+            acc += an_x[k + ma4] - old
 
         # 3. Calcula umbral
-        n_th1 = int(self._mean(an_x_ma4[:buffer_length - self.MA4_SIZE]))
+        n_th1 = self._imean(an_x_ma4[:buffer_length - self.MA4_SIZE])
         n_th1 = max(30, min(n_th1, 60))
 
         # Intervalos admisibles según el rango de BPM que se desea detectar
@@ -124,7 +143,7 @@ class OxygenSaturation:
         # min_gap = self.FreqS // 6          
         # ≈ 0.166 s
         # an_ir_valley_locs = self._find_peaks(an_x_ma4, n_th1, min_gap, 15)
-        min_gap = int((self.FreqS * 60) / HR_MAX)
+        min_gap = self._HR_NUM // HR_MAX
         an_ir_valley_locs = self._find_peaks(an_x_ma4, n_th1, min_gap, 15)
 
         n_npks = len(an_ir_valley_locs)
@@ -132,8 +151,8 @@ class OxygenSaturation:
         # 5. Heart rate: cálculo robusto mediante intervalos entre picos
         peak_intervals = []
 
-        min_interval = int((self.FreqS * 60) / HR_MAX)
-        max_interval = int((self.FreqS * 60) / HR_MIN)
+        min_interval = self._HR_NUM // HR_MAX
+        max_interval = self._HR_NUM // HR_MIN
 
         for k in range(1, n_npks):
             interval = an_ir_valley_locs[k] - an_ir_valley_locs[k - 1]
@@ -146,17 +165,15 @@ class OxygenSaturation:
             peak_intervals.sort()
             n = len(peak_intervals)
 
+            # Doble de la mediana, para mantenerla entera también con n par
             if n % 2 == 1:
-                median_interval = peak_intervals[n // 2]
+                median_x2 = 2 * peak_intervals[n // 2]
             else:
-                median_interval = (
-                    peak_intervals[n // 2 - 1] +
-                    peak_intervals[n // 2]
-                ) / 2
+                median_x2 = peak_intervals[n // 2 - 1] + peak_intervals[n // 2]
+            median_interval = median_x2 / 2
 
-            heart_rate = int(round(
-                (self.FreqS * 60) / median_interval
-            ))
+            # bpm = _HR_NUM / mediana, redondeado al entero más próximo sin división flotante
+            heart_rate = (4 * self._HR_NUM + median_x2) // (2 * median_x2)
 
             # Comprueba que los intervalos no sean excesivamente irregulares
             interval_mean = sum(peak_intervals) / len(peak_intervals)
@@ -179,9 +196,9 @@ class OxygenSaturation:
             heart_rate = -999
             hr_valid = 0
 
-        # 6. Carga valores originales para SpO2
-        an_x = list(ir_buffer)
-        an_y = list(red_buffer)
+        # 6. Valores originales para SpO2 (sólo lectura: se usan sin copiar)
+        an_x = ir_buffer
+        an_y = red_buffer
 
         # 7. Calcula SpO2 usando los valles detectados
         n_exact_ir_valley_locs_count = n_npks
@@ -249,6 +266,7 @@ class OxygenSaturation:
     # ------------------------------------------------------------------
     #  @brief Encuentra hasta *max_num* picos en *x* mayores que *min_height* y separados al menos *min_distance*.
     #  @return Lista de índices de picos."""
+    @micropython.native
     def _find_peaks(self, x, min_height, min_distance, max_num):
         """
         Encuentra hasta max_num picos en x mayores que min_height y separados al menos min_distance.
@@ -0,0 +1,41 @@
+import numpy as np
+from numba import njit
+
+# Media por grupo en una sola pasada sobre datos ORDENADOS por id (procesar_eicu_demo.py):
+# sin tabla hash, cada cambio de id cierra el grupo anterior.
+
+@njit(cache=True)
+def group_mean_sorted(ids, vals):
+    """ids: (n,) ordenado; vals: (n, k) con NaN donde falta el valor.
+    Devuelve (ids únicos (g,), medias (g, k)); NaN si un grupo no tiene ningún valor en esa columna."""
+    n, k = vals.shape
+
+    # Número de grupos
+    g = 0
+    for i in range(n):
+        if i == 0 or ids[i] != ids[i - 1]:
+            g += 1
+
+    out_ids = np.empty(g, ids.dtype)
+    out = np.empty((g, k), np.float64)
+    sums = np.zeros(k, np.float64)
+    counts = np.zeros(k, np.int64)
+    gi = -1
+    for i in range(n):
+        if i == 0 or ids[i] != ids[i - 1]:
+            if gi >= 0:
+                for c in range(k):
+                    out[gi, c] = sums[c] / counts[c] if counts[c] else np.nan
+            gi += 1
+            out_ids[gi] = ids[i]
+            sums[:] = 0.0
+            counts[:] = 0
+        for c in range(k):
+            v = vals[i, c]
+            if not np.isnan(v):
+                sums[c] += v
+                counts[c] += 1
+    if gi >= 0:
+        for c in range(k):
+            out[gi, c] = sums[c] / counts[c] if counts[c] else np.nan
+    return out_ids, out
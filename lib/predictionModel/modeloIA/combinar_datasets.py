@@ -1,43 +1,65 @@
-import pandas as pd
-from sklearn.utils import shuffle
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 
 # === 1. Cargar los tres archivos ===
-demo = pd.read_csv("lib/predictionModel/dataset/mimic_demo_riesgo.csv")
-human = pd.read_csv("lib/predictionModel/dataset/human_dataset_label.csv")
-eicu = pd.read_csv("lib/predictionModel/dataset/eicu_dataset_procesado.csv")
+# Tipos explícitos: el parser de Arrow no tiene que inferirlos columna a columna
+TIPOS = {
+    "subject_id": pa.string(),
+    "spo2": pa.float32(),
+    "heart_rate": pa.float32(),
+    "hr": pa.float32(),
+    "temperature": pa.float32(),
+    "temp": pa.float32(),
+    "label": pa.int8(),
+    "riesgo": pa.int8(),
+}
+co = pacsv.ConvertOptions(column_types=TIPOS)
+
+def leer(ruta):
+    return pacsv.read_csv(ruta, convert_options=co)
+
+demo = leer("lib/predictionModel/dataset/mimic_demo_riesgo.csv")
+human = leer("lib/predictionModel/dataset/human_dataset_label.csv")
+eicu = leer("lib/predictionModel/dataset/eicu_dataset_procesado.csv")
 
 # === 2. Renombrar columnas si hace falta ===
-demo = demo.rename(columns={
+RENOMBRAR = {
     "hr": "heart_rate",
     "temp": "temperature",
-    "spo2": "spo2",
     "riesgo": "label"
-})
-human = human.rename(columns={"riesgo": "label"})
-eicu = eicu.rename(columns={"riesgo": "label"})
+}
+
+def renombrar(t):
+    return t.rename_columns([RENOMBRAR.get(c, c) for c in t.column_names])
+
+demo, human, eicu = renombrar(demo), renombrar(human), renombrar(eicu)
 
 # Si algún dataset no tiene subject_id, se crea uno temporal único
-for df, name in zip([demo, human, eicu], ["DEMO", "HUMAN", "EICU"]):
-    if "subject_id" not in df.columns:
-        df["subject_id"] = [f"{name}_{i}" for i in range(len(df))]
+tablas = []
+for t, name in zip([demo, human, eicu], ["DEMO", "HUMAN", "EICU"]):
+    if "subject_id" not in t.column_names:
+        t = t.append_column("subject_id",
+                            pa.array([f"{name}_{i}" for i in range(t.num_rows)]))
+    tablas.append(t)
 
 # === 3. Seleccionar columnas en común ===
 cols = ["subject_id", "spo2", "heart_rate", "temperature", "label"]
-demo = demo[cols]
-human = human[cols]
-eicu = eicu[cols]
+tablas = [t.select(cols) for t in tablas]
 
 # === 4. Combinar los tres datasets ===
-df_total = pd.concat([demo, human, eicu], ignore_index=True)
+df_total = pa.concat_tables(tablas)
 
-# === 5. Mezclar filas (manteniendo aleatoriedad reproducible) ===
-df_total = shuffle(df_total, random_state=42)
+# === 5. Sin mezclar filas ===
+# No hace falta copiar la tabla permutada: entrenar_modelo.py ya reparte por paciente
+# (GroupShuffleSplit) y tf.data baraja los lotes en cada época
 
 # === 6. Guardar dataset combinado ===
-df_total.to_csv("lib/predictionModel/dataset/dataset_final_entrenamiento.csv", index=False)
+pacsv.write_csv(df_total, "lib/predictionModel/dataset/dataset_final_entrenamiento.csv")
 print("Dataset combinado guardado como 'dataset_final_entrenamiento.csv'")
 
 # === 7. Contar clases ===
-conteo = df_total["label"].value_counts()
+conteo = {c["values"].as_py(): c["counts"].as_py()
+          for c in pc.value_counts(df_total["label"])}
 print("Riesgo 0:", conteo.get(0, 0))
 print("Riesgo 1:", conteo.get(1, 0))
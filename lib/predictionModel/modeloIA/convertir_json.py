@@ -1,21 +1,26 @@
 import numpy as np
-import json
+import orjson
 from pathlib import Path
 
 # Ruta al directorio
 base = Path("lib/predictionModel/modeloIA")
 
-# 1) pesos.npy  -> pesos.json  (lista: [W1, b1, W2, b2, W3, b3])
-pesos = np.load(base / "pesos.npy", allow_pickle=True)
-with open(base / "pesos.json", "w") as f:
-    json.dump([p.tolist() for p in pesos], f, separators=(",", ":"))
+# orjson recorre los arrays de NumPy directamente en C (sin .tolist() intermedio).
+# Se serializan en float64 para que el texto sea idéntico al que generaba json.dump.
+OPT = orjson.OPT_SERIALIZE_NUMPY
 
-# 2) escala.npz -> escala.json  (dict: {"mean": [...], "scale": [...]})
-escala = np.load(base / "escala.npz")
-with open(base / "escala.json", "w") as f:
-    json.dump(
-        {"mean": escala["mean"].tolist(), "scale": escala["scale"].tolist()},
-        f, separators=(",", ":")
-    )
+# 1) pesos.npz  -> pesos.json  (lista: [W1, b1, W2, b2, W3, b3])
+with np.load(base / "pesos.npz") as pesos:
+    (base / "pesos.json").write_bytes(orjson.dumps(
+        [pesos[k].astype(np.float64) for k in ("W1", "b1", "W2", "b2", "W3", "b3")],
+        option=OPT))
+
+# 2) escala.npz -> escala.json  (dict: {"mean": [...], "scale": [...], "inv_scale": [...]})
+# inv_scale = 1/scale se precalcula aquí para que la inferencia multiplique en vez de dividir
+with np.load(base / "escala.npz") as escala:
+    (base / "escala.json").write_bytes(orjson.dumps(
+        {"mean": escala["mean"], "scale": escala["scale"],
+         "inv_scale": 1.0 / escala["scale"]},
+        option=OPT))
 
 print("OK: Generados pesos.json y escala.json")
@@ -1,34 +1,31 @@
 import pandas as pd
 import numpy as np
 
-#Fijar semilla para reproducibilidad
-np.random.seed(42)
+#Generador con semilla fija para reproducibilidad
+rng = np.random.default_rng(42)
 
 #Número de muestras sintéticas de riesgo
-n = 100 
+n = 100
 
-#Generar valores fuera de los rangos normales para provocar riesgo
-heart_rate = np.concatenate([
-    np.random.uniform(30, 55, size=n // 2),  #Muy bajos
-    np.random.uniform(105, 140, size=n // 2) #Muy altos
-])
+#Una sola extracción uniforme [0, 1) para las tres columnas
+u = rng.random((n, 3), dtype=np.float32)
+mitad = np.arange(n) < n // 2
 
-spo2 = np.random.uniform(80, 94, size=n)  #Todos por debajo de 95
+#Generar valores fuera de los rangos normales para provocar riesgo
+heart_rate = np.where(mitad, 30 + u[:, 0] * 25,      #Muy bajos (30-55)
+                             105 + u[:, 0] * 35)     #Muy altos (105-140)
 
-temperature = np.concatenate([
-    np.random.uniform(34.0, 35.9, size=n // 2),  #Hipotermia
-    np.random.uniform(37.6, 40.0, size=n // 2)   #Fiebre
-])
+spo2 = 80 + u[:, 1] * 14  #Todos por debajo de 95 (80-94)
 
-#Todos los datos son de riesgo 1
-riesgo = np.ones(n, dtype=int)
+temperature = np.where(mitad, 34.0 + u[:, 2] * 1.9,  #Hipotermia (34.0-35.9)
+                              37.6 + u[:, 2] * 2.4)  #Fiebre (37.6-40.0)
 
-#Crear DataFrame
+#Crear DataFrame (todos los datos son de riesgo 1)
 df_riesgo_1 = pd.DataFrame({
     "heart_rate": heart_rate,
     "spo2": spo2,
     "temperature": temperature,
-    "riesgo": riesgo
+    "riesgo": 1
 })
 
 #Guardar a CSV
@@ -1,70 +1,165 @@
 # ============================
 # Split por paciente + chequeos
 # ============================
+# Uso (desde la raíz del repositorio):
+#   python lib/predictionModel/modeloIA/entrenar_modelo.py [--batch-size 1024]
+#          [--use-smote] [--split group|random] [--export none|tflite|tflite-int8|onnx]
+import argparse
+import hashlib
+import os
+
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import GroupShuffleSplit
-from sklearn.preprocessing import StandardScaler
 from sklearn.utils.class_weight import compute_class_weight
 from sklearn.metrics import classification_report
-from arquitectura import model   # tu modelo Keras
+from arquitectura import build_model   # fábrica del modelo Keras
 import tensorflow as tf
 
+parser = argparse.ArgumentParser(description="Entrena el MLP de riesgo (SpO2, FC, temperatura)")
+parser.add_argument("--batch-size", type=int, default=1024,
+                    help="tamaño de lote por réplica (por defecto 1024)")
+parser.add_argument("--use-smote", action="store_true",
+                    help="sobremuestrear la clase minoritaria con SMOTE (requiere imbalanced-learn) "
+                         "en lugar de usar class_weight")
+parser.add_argument("--split", choices=["group", "random"], default="group",
+                    help="group: por paciente, sin fuga entre splits (por defecto); random: por filas")
+parser.add_argument("--export", choices=["none", "tflite", "tflite-int8", "onnx"], default="none",
+                    help="formato de salida además de pesos.npz/escala.npz, que se guardan "
+                         "siempre (por defecto none: ninguno)")
+args = parser.parse_args()
+
 # ---- 1) Cargar y limpiar ----
 RUTA = "lib/predictionModel/dataset/dataset_final_entrenamiento.csv"
-df = pd.read_csv(RUTA)
+CACHE_DIR = "lib/predictionModel/.cache"
 
 # columnas necesarias (ajusta si el ID de paciente tiene otro nombre)
-PAC_COL = "subject_id"          
+PAC_COL = "subject_id"
 FEATS   = ["spo2", "heart_rate", "temperature"]
 TARGET  = "label"
 
-faltan = [c for c in [PAC_COL, *FEATS, TARGET] if c not in df.columns]
-if faltan:
-    raise ValueError(f"Faltan columnas requeridas: {faltan}")
-
-df = df[[PAC_COL, *FEATS, TARGET]].dropna().copy()
-df[TARGET] = df[TARGET].astype(int)
-
-# ---- 2) Split por paciente (sin fuga entre grupos) ----
-groups = df[PAC_COL].values
-gss = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
-train_idx, test_idx = next(gss.split(df, groups=groups))
-
-train_df = df.iloc[train_idx].reset_index(drop=True)
-test_df  = df.iloc[test_idx].reset_index(drop=True)
-
-print("Pacientes únicos en train:", train_df[PAC_COL].nunique())
-print("Pacientes únicos en test :", test_df[PAC_COL].nunique())
-print("¿Intersección de pacientes?", 
-      len(set(train_df[PAC_COL]) & set(test_df[PAC_COL])))
-
-# ---- 3) Chequeo de duplicados EXACTOS entre splits (por si hubiera) ----
-def row_hash(frame, cols):
-    # hash rápido por fila en las columnas relevantes
-    return pd.util.hash_pandas_object(frame[cols], index=False)
-
-cols_chequeo = FEATS + [TARGET]
-h_train = set(row_hash(train_df, cols_chequeo))
-h_test  = set(row_hash(test_df,  cols_chequeo))
-overlap = len(h_train & h_test)
-print(f"Filas idénticas (features+label) presentes en train y test: {overlap}")
-
-# ---- 4) Preparar X/y y escalar SIN fuga ----
-X_train = train_df[FEATS].values
-y_train = train_df[TARGET].values
-X_test  = test_df[FEATS].values
-y_test  = test_df[TARGET].values
-
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)   # fit SOLO en train
-X_test  = scaler.transform(X_test)
-
-# ---- 5) Class weights (sin SMOTE) ----
-classes = np.unique(y_train)
-weights = compute_class_weight(class_weight="balanced", classes=classes, y=y_train)
-class_weight = dict(zip(classes, weights))
-print("class_weight:", class_weight)
+def cache_key():
+    # clave: contenido del CSV + contenido de este script + tipo de split
+    # (el mtime cambia con un simple checkout; el contenido no)
+    h = hashlib.sha256()
+    for ruta in (RUTA, __file__):
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+    h.update(args.split.encode())
+    return h.hexdigest()[:12]
+
+def cache_path(nombre):
+    return os.path.join(CACHE_DIR, f"{CLAVE}_{nombre}.npz")
+
+def preparar_datos():
+    """Lee el CSV, hace el split y escala. Devuelve un dict con los arrays ya listos."""
+    import pandas as pd
+    from sklearn.model_selection import GroupShuffleSplit, ShuffleSplit
+    from sklearn.preprocessing import StandardScaler
+
+    df = pd.read_csv(RUTA)
+
+    faltan = [c for c in [PAC_COL, *FEATS, TARGET] if c not in df.columns]
+    if faltan:
+        raise ValueError(f"Faltan columnas requeridas: {faltan}")
+
+    df = df[[PAC_COL, *FEATS, TARGET]].dropna().copy()
+    df[TARGET] = df[TARGET].astype(int)
+
+    # ---- 2) Split por paciente (sin fuga entre grupos) o por filas ----
+    groups = df[PAC_COL].values
+    if args.split == "group":
+        gss = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    else:
+        gss = ShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    train_idx, test_idx = next(gss.split(df, groups=groups))
+
+    train_df = df.iloc[train_idx].reset_index(drop=True)
+    test_df  = df.iloc[test_idx].reset_index(drop=True)
+
+    print("Pacientes únicos en train:", train_df[PAC_COL].nunique())
+    print("Pacientes únicos en test :", test_df[PAC_COL].nunique())
+    print("¿Intersección de pacientes?",
+          len(set(train_df[PAC_COL]) & set(test_df[PAC_COL])))
+
+    # ---- 3) Chequeo de duplicados EXACTOS entre splits (por si hubiera) ----
+    def row_keys(frame, cols):
+        # cada fila como un único valor binario (void) -> comparación en un solo bucle C
+        a = np.ascontiguousarray(frame[cols].to_numpy(dtype=np.float64))
+        return a.view(np.dtype((np.void, a.dtype.itemsize * a.shape[1]))).ravel()
+
+    cols_chequeo = FEATS + [TARGET]
+    overlap = np.intersect1d(row_keys(train_df, cols_chequeo),
+                             row_keys(test_df,  cols_chequeo)).size
+    print(f"Filas idénticas (features+label) presentes en train y test: {overlap}")
+
+    # ---- 4) Preparar X/y y escalar SIN fuga ----
+    # float32 contiguo desde el origen: Keras no tiene que convertir en cada paso
+    X_train = np.ascontiguousarray(train_df[FEATS].to_numpy(dtype=np.float32))
+    X_test  = np.ascontiguousarray(test_df[FEATS].to_numpy(dtype=np.float32))
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)   # fit SOLO en train (conserva float32)
+    X_test  = scaler.transform(X_test)
+
+    return dict(
+        X_train=X_train, y_train=train_df[TARGET].to_numpy(dtype=np.int8),
+        X_test=X_test,   y_test=test_df[TARGET].to_numpy(dtype=np.int8),
+        # unicode de ancho fijo y no object: np.savez guardaría un pickle que np.load rechaza
+        groups_train=train_df[PAC_COL].astype(str).to_numpy().astype("U"),
+        mean=scaler.mean_, scale=scaler.scale_,
+    )
+
+# Caché de la matriz escalada: si el CSV no ha cambiado se salta pandas + StandardScaler
+CLAVE = cache_key()
+ruta_cache = cache_path("datos")
+if os.path.exists(ruta_cache):
+    print("Usando datos en caché:", ruta_cache)
+    with np.load(ruta_cache) as npz:
+        datos = {k: npz[k] for k in npz.files}
+else:
+    datos = preparar_datos()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez(ruta_cache, **datos)
+    # la siguiente ejecución debe leer lo mismo (np.load sin allow_pickle)
+    with np.load(ruta_cache) as npz:
+        for k in ("X_train", "y_train", "groups_train"):
+            assert np.array_equal(npz[k], datos[k]), f"caché ilegible o distinta: {k}"
+
+X_train, X_test = datos["X_train"], datos["X_test"]
+y_train = datos["y_train"].astype(np.float32)
+y_test  = datos["y_test"].astype(np.float32)
+
+# ---- 5) Validación y balanceo de clases ----
+# Validación: 10% de los pacientes de train (por grupo, igual que el split de test)
+if args.split == "group":
+    from sklearn.model_selection import GroupShuffleSplit
+    val_split = GroupShuffleSplit(n_splits=1, test_size=0.1, random_state=42)
+else:
+    from sklearn.model_selection import ShuffleSplit
+    val_split = ShuffleSplit(n_splits=1, test_size=0.1, random_state=42)
+fit_idx, val_idx = next(val_split.split(X_train, groups=datos["groups_train"]))
+
+X_fit, y_fit = X_train[fit_idx], y_train[fit_idx]
+if args.use_smote:
+    # SMOTE es determinista (random_state fijo): su salida también se cachea con la misma clave
+    ruta_smote = cache_path("smote")
+    if os.path.exists(ruta_smote):
+        with np.load(ruta_smote) as npz:
+            X_fit, y_fit = npz["X"], npz["y"]
+    else:
+        from imblearn.over_sampling import SMOTE   # solo se importa si se pide
+        X_fit, y_fit = SMOTE(random_state=42).fit_resample(X_fit, y_fit.astype(int))
+        X_fit, y_fit = X_fit.astype(np.float32), y_fit.astype(np.float32)
+        np.savez(ruta_smote, X=X_fit, y=y_fit)
+    class_weight = None
+    print("SMOTE:", len(fit_idx), "->", len(X_fit), "filas")
+else:
+    # solo las filas que recibe fit (sin las de validación); claves enteras para class_weight
+    y_fit_int = y_fit.astype(int)
+    classes = np.unique(y_fit_int)
+    weights = compute_class_weight(class_weight="balanced", classes=classes, y=y_fit_int)
+    class_weight = dict(zip(classes, weights))
+    print("class_weight:", class_weight)
 
 # ---- 6) Entrenar ----
 callbacks = [
@@ -74,19 +169,28 @@ callbacks = [
                                          factor=0.5, patience=3, min_lr=1e-5),
 ]
 
-model.compile(
-    optimizer=tf.keras.optimizers.Adam(1e-3),
-    loss='binary_crossentropy',
-    metrics=[tf.keras.metrics.AUC(curve='PR', name='pr_auc'),
-             tf.keras.metrics.Recall(name='recall'),
-             'accuracy']
-)
+# Réplica de datos en todas las GPUs visibles (en CPU o 1 GPU equivale a un solo dispositivo)
+strategy = tf.distribute.MirroredStrategy()
+print("Réplicas:", strategy.num_replicas_in_sync)
+with strategy.scope():
+    model = build_model()   # variables creadas y compiladas dentro del scope
+
+GLOBAL_BATCH = args.batch_size * strategy.num_replicas_in_sync
+
+# Pipelines tf.data: el ensamblado de lotes se solapa con el cómputo (prefetch)
+def make_ds(X, y, shuffle=False):
+    ds = tf.data.Dataset.from_tensor_slices((X, y))
+    if shuffle:
+        ds = ds.shuffle(len(X), seed=42)
+    return ds.batch(GLOBAL_BATCH).prefetch(tf.data.AUTOTUNE)
+
+train_ds = make_ds(X_fit, y_fit, shuffle=True)
+val_ds   = make_ds(X_train[val_idx], y_train[val_idx])
 
 history = model.fit(
-    X_train, y_train,
+    train_ds,
+    validation_data=val_ds,
     epochs=50,
-    batch_size=1024,
-    validation_split=0.1,
     callbacks=callbacks,
     class_weight=class_weight,
     verbose=1
@@ -98,10 +202,59 @@ print(f"\nTest  | acc={acc:.3f}  pr_auc={pr_auc:.3f}  recall={recall:.3f}")
 
 y_prob = model.predict(X_test, verbose=0).ravel()
 y_pred = (y_prob >= 0.5).astype(int)
-print("\nReporte de clasificación:\n", classification_report(y_test, y_pred, digits=3))
+print("\nReporte de clasificación:\n", classification_report(y_test.astype(int), y_pred, digits=3))
 
 # ---- 8) Guardar pesos y escala ----
-np.save("lib/predictionModel/modeloIA/pesos.npy",
-        np.array(model.get_weights(), dtype=object), allow_pickle=True)
+# La estandarización (x - mean) / scale es lineal: se pliega en la primera capa
+#   W1' = W1 * (1/scale)[:, None]      b1' = b1 - (mean/scale) @ W1
+# así la inferencia recibe las features en bruto y no necesita escala.json
+W1, b1, W2, b2, W3, b3 = model.get_weights()
+inv_s = 1.0 / datos["scale"]
+W1_folded = (W1 * inv_s[:, None]).astype(np.float32)
+b1_folded = (b1 - (datos["mean"] * inv_s) @ W1).astype(np.float32)
+# Arrays con nombre y forma fija (sin pickle)
+np.savez("lib/predictionModel/modeloIA/pesos.npz",
+         W1=W1_folded, b1=b1_folded, W2=W2, b2=b2, W3=W3, b3=b3)
 np.savez("lib/predictionModel/modeloIA/escala.npz",
-         mean=scaler.mean_, scale=scaler.scale_)
+         mean=datos["mean"], scale=datos["scale"])
+
+# ---- 9) Exportar a TFLite u ONNX (opcional) ----
+def build_model_f32(weights):
+    # Con precisión mixta (GPU) las capas ocultas calcularían en float16: los modelos
+    # exportados se construyen siempre en float32 y reciben los pesos maestros
+    policy = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy("float32")
+    try:
+        m = build_model()
+    finally:
+        tf.keras.mixed_precision.set_global_policy(policy)
+    m.set_weights(weights)
+    return m
+
+if args.export == "tflite":
+    conv = tf.lite.TFLiteConverter.from_keras_model(build_model_f32(model.get_weights()))
+    with open("lib/predictionModel/compiledModel/modelo_ia_riesgo.tflite", "wb") as f:
+        f.write(conv.convert())
+elif args.export == "tflite-int8":
+    # Cuantización INT8 completa
+    # Dataset representativo (ya escalado) para calibrar los rangos de activación
+    def rep_dataset():
+        for row in X_train[:200]:
+            yield [row.reshape(1, len(FEATS)).astype(np.float32)]
+
+    conv = tf.lite.TFLiteConverter.from_keras_model(build_model_f32(model.get_weights()))
+    conv.optimizations = [tf.lite.Optimize.DEFAULT]
+    conv.representative_dataset = rep_dataset
+    conv.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    conv.inference_input_type = tf.int8
+    conv.inference_output_type = tf.int8
+    with open("lib/predictionModel/compiledModel/modelo_ia_riesgo_int8.tflite", "wb") as f:
+        f.write(conv.convert())
+elif args.export == "onnx":
+    # Modelo para el servidor (inference_onnx.py): mismos pesos que pesos.npz, con la
+    # estandarización plegada, así la entrada son las features en bruto
+    import tf2onnx   # solo se importa si se pide
+    model_raw = build_model_f32([W1_folded, b1_folded, W2, b2, W3, b3])
+    spec = (tf.TensorSpec((None, len(FEATS)), tf.float32, name="x"),)
+    tf2onnx.convert.from_keras(model_raw, input_signature=spec,
+                               output_path="lib/predictionModel/compiledModel/modelo_ia_riesgo.onnx")
@@ -0,0 +1,60 @@
+import numpy as np
+from numba import njit, prange
+
+# Variante compilada con Numba de pesos_modelo_np.predict_batch, para puntuar muchos
+# pacientes por segundo en el servidor. Toda la red (3 -> 32 -> 16 -> 1) va en un solo
+# kernel: cada fila se procesa de principio a fin sin matrices intermedias, y las filas
+# se reparten entre los núcleos con prange.
+
+# ==== 1. Cargar pesos (pesos.npz, la estandarización ya va plegada en W1/b1) ====
+PESOS_PATH = "lib/predictionModel/modeloIA/pesos.npz"
+
+with np.load(PESOS_PATH) as d:
+    W1, b1, W2, b2, W3, b3 = [np.ascontiguousarray(d[k], dtype=np.float32)
+                              for k in ("W1", "b1", "W2", "b2", "W3", "b3")]
+
+# ==== 2. Kernel fusionado ====
+@njit(parallel=True, fastmath=True, cache=True)
+def _forward(X, W1, b1, W2, b2, W3, b3):
+    N, nin = X.shape
+    n1 = W1.shape[1]
+    n2 = W2.shape[1]
+    out = np.empty(N, np.float32)
+    for n in prange(N):
+        a1 = np.empty(n1, np.float32)
+        a2 = np.empty(n2, np.float32)
+
+        # Capa 1 (incluye la estandarización) + ReLU
+        for i in range(n1):
+            s = b1[i]
+            for j in range(nin):
+                s += X[n, j] * W1[j, i]
+            a1[i] = s if s > 0 else 0.0
+
+        # Capa 2 + ReLU
+        for i in range(n2):
+            s = b2[i]
+            for j in range(n1):
+                s += a1[j] * W2[j, i]
+            a2[i] = s if s > 0 else 0.0
+
+        # Capa 3 (salida) + sigmoide
+        z = b3[0]
+        for j in range(n2):
+            z += a2[j] * W3[j, 0]
+        out[n] = 1.0 / (1.0 + np.exp(-z))
+    return out
+
+# ==== 3. Funciones de inferencia ====
+def predict_batch(X):
+    """Misma interfaz que pesos_modelo_np.predict_batch.
+    X: matriz (N, 3) con [spo2, heart_rate, temperature] por fila.
+    Devuelve (labels, y): arrays (N,) con la clase 0/1 y la probabilidad."""
+    x = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float32)
+    y = _forward(x, W1, b1, W2, b2, W3, b3)
+    return (y > 0.5).astype(np.int8), y
+
+def predict(features):
+    """(label, y) para una sola muestra, igual que pesos_modelo.predict."""
+    labels, y = predict_batch(np.asarray(features, dtype=np.float32)[None, :])
+    return int(labels[0]), float(y[0])
@@ -0,0 +1,29 @@
+import numpy as np
+import onnxruntime as ort
+
+# Inferencia en el servidor con ONNX Runtime (CPU, kernels MLAS). El modelo se exporta con
+#   python lib/predictionModel/modeloIA/entrenar_modelo.py --export onnx
+# y recibe las features en bruto (la estandarización va plegada en la primera capa).
+# Con ORT_ENABLE_ALL el grafo fusiona MatMul+Add(+ReLU) antes de ejecutarse.
+
+# ==== 1. Cargar la sesión ====
+MODELO_PATH = "lib/predictionModel/compiledModel/modelo_ia_riesgo.onnx"
+
+so = ort.SessionOptions()
+so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+sess = ort.InferenceSession(MODELO_PATH, sess_options=so, providers=["CPUExecutionProvider"])
+INPUT_NAME = sess.get_inputs()[0].name
+
+# ==== 2. Funciones de inferencia ====
+def predict_batch(X):
+    """Misma interfaz que pesos_modelo_np.predict_batch.
+    X: matriz (N, 3) con [spo2, heart_rate, temperature] por fila.
+    Devuelve (labels, y): arrays (N,) con la clase 0/1 y la probabilidad."""
+    x = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float32)
+    y = sess.run(None, {INPUT_NAME: x})[0].ravel()
+    return (y > 0.5).astype(np.int8), y
+
+def predict(features):
+    """(label, y) para una sola muestra, igual que pesos_modelo.predict."""
+    labels, y = predict_batch(np.asarray(features, dtype=np.float32)[None, :])
+    return int(labels[0]), float(y[0])
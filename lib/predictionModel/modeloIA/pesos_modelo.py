@@ -1,68 +1,126 @@
 import math
+import micropython
 import ujson  # MicroPython usa ujson en vez de json
+from array import array
 
-# ==== 1. Cargar pesos y biases desde archivo JSON ====
-PESOS_PATH = "/lib/predictionModel/modeloIA/pesos.json"
-ESCALA_PATH = "/lib/predictionModel/modeloIA/escala.json"
+# ==== 1. Cargar pesos INT8 desde archivo JSON (generado con quantize_weights.py) ====
+PESOS_PATH = "/lib/predictionModel/modeloIA/pesos_int8.json"
 
 def _load_json(path):
     with open(path) as f:
         return ujson.load(f)
 
-# Cargar pesos (lista)
-pesos = _load_json(PESOS_PATH)
-W1 = pesos[0]
-b1 = pesos[1]
-W2 = pesos[2]
-b2 = pesos[3]
-W3 = pesos[4]
-b3 = pesos[5]
+def _flatten(W, typecode='b'):
+    """Matriz W (n_entradas x n_neuronas) -> (array fila a fila, n_entradas, n_neuronas)"""
+    nin, nout = len(W), len(W[0])
+    return array(typecode, [W[j][i] for j in range(nin) for i in range(nout)]), nin, nout
 
-# Cargar escalas (diccionario)
-escala = _load_json(ESCALA_PATH)
-mean = escala["mean"]
-scale = escala["scale"]
+modelo = _load_json(PESOS_PATH)
+c1, c2, c3 = modelo["capas"]
+
+# Entrada: estandarizar y pasar a entero en un solo producto por feature
+#   x_q = (x - mean) * inv_scale / sx1
+mean = array('f', modelo["mean"])
+K_IN = array('f', [v / c1["sx"] for v in modelo["inv_scale"]])
+
+# Capas ocultas: el acumulador entero se reescala directamente a la entrada entera
+# de la capa siguiente   x_q' = acc * (s * sx / sx') + b / sx'
+# La capa 1 lleva pesos de 12 bits (array('h')): con las entradas en los extremos del
+# recorte de main.py, el redondeo INT8 de W1 era la mayor fuente de error
+W1, N_IN1, N_OUT1 = _flatten(c1["W"], 'h')
+K1 = c1["s"] * c1["sx"] / c2["sx"]
+B1 = array('f', [v / c2["sx"] for v in c1["b"]])
+W2, N_IN2, N_OUT2 = _flatten(c2["W"])
+K2 = c2["s"] * c2["sx"] / c3["sx"]
+B2 = array('f', [v / c3["sx"] for v in c2["b"]])
+
+# Capa de salida: logit en float   z = acc * s * sx + b
+W3, N_IN3, N_OUT3 = _flatten(c3["W"])
+K3 = c3["s"] * c3["sx"]
+B3 = c3["b"][0]
+del modelo, c1, c2, c3
+
+# Búferes enteros reutilizados entre inferencias
+_x_q = array('i', [0] * N_IN1)
+_a1_q = array('i', [0] * N_OUT1)
+_a2_q = array('i', [0] * N_OUT2)
+_acc = array('i', [0] * max(N_OUT1, N_OUT2, N_OUT3))  # acumuladores int32 de matvec_q
 
 # ==== 2. Funciones auxiliares ====
-def standardize(x):
-    return [(x[i] - mean[i]) / scale[i] for i in range(len(x))]
+# La ReLU va dentro de dot_q (junto al reescalado), sin pasada aparte sobre el array.
+# El reescalado acc * k se deja en float: con activaciones de 16 bits el acumulador
+# llega a ~2^27 y un multiplicador en punto fijo desbordaría los enteros de 32 bits.
 
-def relu(x):
-    return [max(0, i) for i in x]
+# Tabla de la sigmoide en [-8, 8] con paso 0.25 (65 valores), calculada una sola vez
+# al importar: en inferencia solo se interpola, sin llamar a math.exp
+_SIG = [1 / (1 + math.exp(-i / 4)) for i in range(-32, 33)]
 
 def sigmoid(x):
-    return 1 / (1 + math.exp(-x))
-
-def dot(W, x, b):
-    """Multiplicación de matriz W (n_entradas x n_neuronas) * x + bias"""
-    result = []
-    for i in range(len(W[0])):  # para cada neurona
-        s = 0
-        for j in range(len(x)):
-            s += x[j] * W[j][i]
-        s += b[i]
-        result.append(s)
-    return result
+    if x <= -8:
+        return _SIG[0]
+    if x >= 8:
+        return _SIG[64]
+    t = (x + 8) * 4
+    i = int(t)
+    return _SIG[i] + (_SIG[i + 1] - _SIG[i]) * (t - i)
+
+@micropython.viper
+def matvec_q(W: ptr8, nin: int, nout: int, x: ptr32, acc: ptr32):
+    """acc[i] = sum_j x[j] * W[j][i] con aritmética entera de máquina (viper).
+    W es el array('b') fila a fila: se recorre en orden de memoria y, como ptr8 lee
+    bytes sin signo, cada peso se extiende a signo a mano"""
+    for i in range(nout):
+        acc[i] = 0
+    k = 0
+    for j in range(nin):
+        xj = x[j]
+        for i in range(nout):
+            w = W[k]
+            if w > 127:
+                w -= 256
+            acc[i] += xj * w
+            k += 1
+
+@micropython.viper
+def matvec_q16(W: ptr16, nin: int, nout: int, x: ptr32, acc: ptr32):
+    """Como matvec_q, con pesos array('h') (ptr16 también lee sin signo)"""
+    for i in range(nout):
+        acc[i] = 0
+    k = 0
+    for j in range(nin):
+        xj = x[j]
+        for i in range(nout):
+            w = W[k]
+            if w > 32767:
+                w -= 65536
+            acc[i] += xj * w
+            k += 1
+
+@micropython.native
+def dot_q(matvec, W, nin, nout, x, k, b, out):
+    """Capa oculta entera: acumula x_q * W_q en entero, reescala, ReLU y redondea a out"""
+    acc = _acc
+    matvec(W, nin, nout, x, acc)
+    for i in range(nout):  # para cada neurona
+        v = acc[i] * k + b[i]
+        out[i] = int(v + 0.5) if v > 0 else 0
+    return out
 
 # ==== 3. Función de inferencia ====
 def predict(features):
-    # Estandarizar entrada
-    x = standardize(features)
-
-    # Capa 1
-    z1 = dot(W1, x, b1)
-    a1 = relu(z1)
+    # Entrada estandarizada y cuantizada
+    x_q = _x_q
+    for j in range(N_IN1):
+        x_q[j] = round((features[j] - mean[j]) * K_IN[j])
 
-    # Capa 2
-    z2 = dot(W2, a1, b2)
-    a2 = relu(z2)
+    # Capa 1 y capa 2 (ReLU incluida)
+    a1 = dot_q(matvec_q16, W1, N_IN1, N_OUT1, x_q, K1, B1, _a1_q)
+    a2 = dot_q(matvec_q, W2, N_IN2, N_OUT2, a1, K2, B2, _a2_q)
 
     # Capa 3 (salida)
-    z3 = 0
-    for i in range(len(a2)):
-        z3 += a2[i] * W3[i][0]
-    z3 += b3[0]
+    matvec_q(W3, N_IN3, N_OUT3, a2, _acc)
+    z3 = _acc[0] * K3 + B3
     y = sigmoid(z3)
 
-    # Umbral de clasificación
-    return 1 if y > 0.5 else 0, y
+    # Umbral de clasificación sobre el logit (z3 >= 0  <=>  y >= 0.5)
+    return 1 if z3 >= 0 else 0, y
@@ -0,0 +1,68 @@
+import threading
+
+import numpy as np
+
+# Variante CPython (NumPy) de pesos_modelo.py, para puntuar en el ordenador/servidor.
+# Misma red (3 -> 32 -> 16 -> 1) pero con operaciones vectorizadas en vez de bucles.
+
+# ==== 1. Cargar pesos (pesos.npz, mismos valores que el pesos.json del ESP32) ====
+PESOS_PATH = "lib/predictionModel/modeloIA/pesos.npz"
+
+# Arrays con nombre y forma fija, sin pickle
+# (la estandarización mean/scale ya va plegada en W1/b1)
+with np.load(PESOS_PATH) as d:
+    W1, b1, W2, b2, W3, b3 = [np.ascontiguousarray(d[k], dtype=np.float32)
+                              for k in ("W1", "b1", "W2", "b2", "W3", "b3")]
+
+# ==== 2. Funciones auxiliares ====
+def relu(z):
+    return np.maximum(0.0, z, out=z)  # in situ, sin matriz temporal
+
+# ==== 3. Funciones de inferencia ====
+# Búferes de activaciones reutilizados entre llamadas: un solo juego por hilo, del tamaño
+# del mayor lote visto en ese hilo; cada llamada usa las primeras n filas ([:n], sin copia).
+# threading.local evita que dos hilos escriban en los mismos búferes
+_local = threading.local()
+
+def _workspace(n):
+    ws = getattr(_local, "ws", None)
+    if ws is None or ws[0].shape[0] < n:
+        ws = (np.empty((n, W1.shape[1]), dtype=np.float32),
+              np.empty((n, W2.shape[1]), dtype=np.float32),
+              np.empty((n, W3.shape[1]), dtype=np.float32))
+        _local.ws = ws
+    return ws[0][:n], ws[1][:n], ws[2][:n]
+
+def predict_batch(X):
+    """Puntúa varios pacientes a la vez.
+    X: matriz (N, 3) con [spo2, heart_rate, temperature] por fila.
+    Devuelve (labels, y): arrays (N,) con la clase 0/1 y la probabilidad."""
+    x = np.atleast_2d(np.asarray(X, dtype=np.float32))
+    A1, A2, Z3 = _workspace(x.shape[0])
+
+    # Capa 1 (incluye la estandarización): (N,3) -> (N,32)
+    np.matmul(x, W1, out=A1)
+    A1 += b1
+    relu(A1)
+
+    # Capa 2: (N,32) -> (N,16)
+    np.matmul(A1, W2, out=A2)
+    A2 += b2
+    relu(A2)
+
+    # Capa 3 (salida) + sigmoide 1/(1+exp(-z)), todo sobre el mismo búfer
+    np.matmul(A2, W3, out=Z3)
+    Z3 += b3
+    np.negative(Z3, out=Z3)
+    np.exp(Z3, out=Z3)
+    Z3 += 1.0
+    np.reciprocal(Z3, out=Z3)
+    y = Z3.ravel().copy()  # copia: el búfer se reutiliza en la siguiente llamada
+
+    # Umbral de clasificación
+    return (y > 0.5).astype(np.int8), y
+
+def predict(features):
+    """Misma interfaz que pesos_modelo.predict: (label, y) para una sola muestra."""
+    labels, y = predict_batch(np.asarray(features, dtype=np.float32)[None, :])
+    return int(labels[0]), float(y[0])
@@ -1,12 +1,12 @@
 import numpy as np
 
 # === Cargar pesos ===
-pesos = np.load("lib/predictionModel/modeloIA/pesos.npy", allow_pickle=True)
+pesos = np.load("lib/predictionModel/modeloIA/pesos.npz")
 
 print("===== Pesos y Bias =====\n")
-for i, p in enumerate(pesos):
-    print(f"Pesos[{i}]:")
-    print(p.tolist())  # lo convierte a lista para usar en MicroPython
+for nombre in ("W1", "b1", "W2", "b2", "W3", "b3"):
+    print(f"{nombre} {pesos[nombre].shape}:")
+    print(pesos[nombre].tolist())  # lo convierte a lista para usar en MicroPython
     print()
 
 # === Cargar media y escala del StandardScaler ===
@@ -1,23 +1,29 @@
+import gzip
+import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from pathlib import Path
+from agrupar_numba import group_mean_sorted
+
+# Descompresión gzip en paralelo (por bloques DEFLATE) con rapidgzip si está instalado;
+# si no, gzip de la biblioteca estándar (lo mismo que usaría pandas por dentro)
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+
+def abrir_gz(ruta):
+    if rapidgzip is not None:
+        return rapidgzip.open(str(ruta), parallelization=os.cpu_count())
+    return gzip.open(ruta, "rb")
 
 # ===== 1) Rutas =====
 base = Path("lib/predictionModel/dataset/eicu-collaborative-research-database-demo-2.0")
 p_periodic   = base / "vitalPeriodic.csv.gz"
 p_aperiodic  = base / "vitalAperiodic.csv.gz"
 
-print(f"Leyendo: {p_periodic.name}, {p_aperiodic.name}")
-vp = pd.read_csv(p_periodic)
-va = pd.read_csv(p_aperiodic)
-
-# Helper: búsqueda tolerante por alias (ignora mayúsculas/minúsculas)
-def pick_col(df, aliases):
-    cols = {c.lower(): c for c in df.columns}
-    for a in aliases:
-        if a.lower() in cols:
-            return cols[a.lower()]
-    return None
-
 # Aliases habituales en eICU (y variantes)
 ALIASES = {
     "heart_rate":  ["heartRate", "heartrate", "hr", "pulse", "pulseRate"],
@@ -25,43 +31,48 @@ ALIASES = {
     "temperature": ["temperature", "tempc", "temperaturec", "temp", "temperatureF", "tempf"],
 }
 
+# Alias ya en minúsculas, calculados una sola vez al importar
+ALIASES_LC = {k: tuple(a.lower() for a in v) for k, v in ALIASES.items()}
+
+# Búsqueda tolerante por alias (ignora mayúsculas/minúsculas): un dict de columnas por
+# DataFrame y una consulta por alias candidato
 def extract_signals(df, origin_name):
+    cols = {c.lower(): c for c in df.columns}
     out = {}
     found = {}
-    for k, aliases in ALIASES.items():
-        col = pick_col(df, aliases)
+    for k, alc in ALIASES_LC.items():
+        col = next((cols[a] for a in alc if a in cols), None)
         if col:
             out[k] = col
             found[k] = f"{origin_name}.{col}"
     return out, found
 
-map_vp, found_vp = extract_signals(vp, "vitalPeriodic")
-map_va, found_va = extract_signals(va, "vitalAperiodic")
+# Primero solo la cabecera para resolver los alias; después se leen únicamente el id y
+# las señales encontradas, con tipos estrechos (int32 / float32) en vez de int64 / float64
+def leer_vitales(ruta, origin_name):
+    with abrir_gz(ruta) as f:
+        cabecera = pd.read_csv(f, compression=None, nrows=0)
+    mapa, found = extract_signals(cabecera, origin_name)
+    tipos = {"patientunitstayid": "int32", **{col: "float32" for col in mapa.values()}}
+    with abrir_gz(ruta) as f:
+        df = pd.read_csv(f, compression=None, usecols=list(tipos), dtype=tipos)
+    return df, mapa, found
+
+print(f"Leyendo: {p_periodic.name}, {p_aperiodic.name}")
+vp, map_vp, found_vp = leer_vitales(p_periodic, "vitalPeriodic")
+va, map_va, found_va = leer_vitales(p_aperiodic, "vitalAperiodic")
 
 print("Encontradas en vitalPeriodic:", found_vp or "-")
 print("Encontradas en vitalAperiodic:", found_va or "-")
 
-frames = []
-
-if map_vp:
-    cols = ["patientunitstayid"] + [map_vp.get(k) for k in map_vp]
-    df_vp = vp[cols].copy()
-    df_vp.rename(columns={
-        map_vp.get("heart_rate",  None): "heart_rate",
-        map_vp.get("spo2",        None): "spo2",
-        map_vp.get("temperature", None): "temperature",
-    }, inplace=True)
-    frames.append(df_vp)
-
-if map_va:
-    cols = ["patientunitstayid"] + [map_va.get(k) for k in map_va]
-    df_va = va[cols].copy()
-    df_va.rename(columns={
-        map_va.get("heart_rate",  None): "heart_rate",
-        map_va.get("spo2",        None): "spo2",
-        map_va.get("temperature", None): "temperature",
-    }, inplace=True)
-    frames.append(df_va)
+# DataFrame pequeño con las columnas ya renombradas, construido sobre los arrays de la
+# tabla original (sin .copy() de la tabla completa ni rename)
+def seleccionar(df, mapa):
+    datos = {"patientunitstayid": df["patientunitstayid"].to_numpy()}
+    datos.update({k: df[col].to_numpy() for k, col in mapa.items()})
+    return pd.DataFrame(datos, copy=False)
+
+frames = [seleccionar(df, mapa) for df, mapa in ((vp, map_vp), (va, map_va)) if mapa]
 
 if not frames:
     raise RuntimeError("No se encontraron señales en ninguna tabla.")
@@ -83,25 +94,30 @@ vitals = vitals[["patientunitstayid", "heart_rate", "spo2", "temperature"]]
 # Quitar filas totalmente vacías (por si hay registros sin ninguna señal)
 vitals.dropna(how="all", subset=["heart_rate", "spo2", "temperature"], inplace=True)
 
-# Promedio por paciente
-df_avg = vitals.groupby("patientunitstayid").mean(numeric_only=True).reset_index()
+# Promedio por paciente: un orden estable por id y una sola pasada compilada con Numba
+# que cierra cada grupo al cambiar de id (sin hash). Los NaN se ignoran como en .mean()
+vitals.sort_values("patientunitstayid", kind="stable", inplace=True)
+ids, medias = group_mean_sorted(vitals["patientunitstayid"].to_numpy(),
+                                vitals[["heart_rate", "spo2", "temperature"]].to_numpy(np.float32))
 
 # ——— FILTRO FINAL: solo pacientes con las 3 señales presentes ———
-df_avg = df_avg.dropna(subset=["heart_rate", "spo2", "temperature"], how="any")
-
-# Clasifica riesgo 
-def clasifica_riesgo(row):
-    hr, sp, tc = row["heart_rate"], row["spo2"], row["temperature"]
-    return int((hr > 90 or hr < 60) or (sp < 95) or (tc > 37.5 or tc < 36))
+completo = ~np.isnan(medias).any(axis=1)
+df_avg = pd.DataFrame(medias[completo], columns=["heart_rate", "spo2", "temperature"])
+df_avg.insert(0, "patientunitstayid", ids[completo])
 
-df_avg["riesgo"] = df_avg.apply(clasifica_riesgo, axis=1)
+# Clasifica riesgo (vectorizado sobre los arrays de NumPy, sin función por fila)
+hr = df_avg["heart_rate"].to_numpy()
+sp = df_avg["spo2"].to_numpy()
+tc = df_avg["temperature"].to_numpy()
+df_avg["riesgo"] = ((hr > 90) | (hr < 60) | (sp < 95) | (tc > 37.5) | (tc < 36)).astype(np.uint8)
 
 # Renombrar ID y exportar
 df_avg.rename(columns={"patientunitstayid": "subject_id"}, inplace=True)
 df_final = df_avg[["subject_id", "heart_rate", "spo2", "temperature", "riesgo"]].copy()
 
 out_path = Path("lib/predictionModel/dataset/eicu_dataset_procesado.csv")
-df_final.to_csv(out_path, index=False)
+# Escritor CSV de Arrow (C++, multihilo) en vez de to_csv
+pacsv.write_csv(pa.Table.from_pandas(df_final, preserve_index=False), out_path)
 
 print(f"✅ Guardado: {out_path}  (pacientes con 3 señales={len(df_final)})")
 print(df_final.head())
@@ -1,7 +1,12 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 # Cargar el dataset
-df = pd.read_csv("lib/predictionModel/dataset/human_dataset_riesgo.csv")
+df = pd.read_csv("lib/predictionModel/dataset/human_dataset_riesgo.csv",
+                 dtype={"subject_id": "int32", "heart_rate": "float32",
+                        "spo2": "float32", "temperature": "float32"})
 
 # Asegurarse de que los nombres estén en minúscula por consistencia
 df.columns = df.columns.str.lower()
@@ -10,20 +15,20 @@ df.columns = df.columns.str.lower()
 if 'riesgo' in df.columns:
     df.drop(columns=['riesgo'], inplace=True)
 
-# Crear columna 'label' según tus criterios
-def clasifica_riesgo(row):
-    return int(
-        (row.get('heart_rate', 0) > 90) or
-        (row.get('heart_rate', 0) < 60) or
-        (row.get('spo2', 100) < 95) or
-        (row.get('temperature', 0) > 37.5) or
-        (row.get('temperature', 0) < 36)
-    )
+# Crear columna 'label' según tus criterios (vectorizado, sin función por fila)
+# Si falta una columna se usa el mismo valor por defecto que antes con row.get();
+# los NaN no cumplen ninguna comparación, igual que en la versión por filas
+def columna(nombre, defecto):
+    return df[nombre].to_numpy() if nombre in df.columns else np.full(len(df), defecto)
 
-df["label"] = df.apply(clasifica_riesgo, axis=1)
+hr = columna('heart_rate', 0)
+sp = columna('spo2', 100)
+tc = columna('temperature', 0)
+df["label"] = ((hr > 90) | (hr < 60) | (sp < 95) | (tc > 37.5) | (tc < 36)).astype(np.uint8)
 
 # Dejar sólo las columnas relevantes
 df = df[["subject_id", "spo2", "heart_rate", "temperature", "label"]]
 
-# Guardar el nuevo archivo
-df.to_csv("lib/predictionModel/dataset/human_dataset_label.csv", index=False)
+# Guardar el nuevo archivo (escritor CSV de Arrow en C++, el mismo que combinar_datasets.py)
+pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False),
+                "lib/predictionModel/dataset/human_dataset_label.csv")
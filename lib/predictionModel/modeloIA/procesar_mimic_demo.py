@@ -1,41 +1,70 @@
+import gzip
+import os
+import numpy as np
 import pandas as pd
-#Importa la librería pandas, que sirve para manipular datos tabulares (como los csv)
+import pyarrow as pa
+import pyarrow.csv as pacsv
+#Importa las librerías numpy y pandas, que sirven para operar con arrays y manipular datos tabulares (como los csv)
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+def abrir_gz(ruta):
+    if rapidgzip is not None:
+        return rapidgzip.open(ruta, parallelization=os.cpu_count())
+    return gzip.open(ruta, "rb")
+#Abre un .csv.gz descomprimiendo en paralelo (por bloques DEFLATE) con rapidgzip si está instalado; si no, con gzip de la biblioteca estándar (lo mismo que usaría pandas por dentro)
 items = pd.read_csv("lib/predictionModel/dataset/mimic-iv-clinical-database-demo-2.2/icu/d_items.csv.gz", compression="gzip")
-chartevents = pd.read_csv("lib/predictionModel/dataset/mimic-iv-clinical-database-demo-2.2/icu/chartevents.csv.gz", compression="gzip")
 patients = pd.read_csv("lib/predictionModel/dataset/mimic-iv-clinical-database-demo-2.2/hosp/patients.csv.gz", compression="gzip")
-#Carga tres archivos del dataset MIMIC-IV demo: chartevents.csv (contiene miles de registros de signos vitales por paciente), d_items.csv y patients.csv (tiene datos básicos por paciente)
+#Carga dos archivos del dataset MIMIC-IV demo: d_items.csv y patients.csv (tiene datos básicos por paciente)
 ITEMID_MAP = {
     220045: 'heart_rate',      
     220277: 'spo2',            
     223761: 'temperature'      
 }
 #Define qué itemid corresponde a qué variable, esto se extrae del diccionario d_items.csv
-vitals = chartevents[chartevents['itemid'].isin(ITEMID_MAP.keys())].copy()
-#vitals selecciona sOlo las filas que contienen los itemid de las variables que interesan
-vitals['label'] = vitals['itemid'].map(ITEMID_MAP)
-#vitals['label'] crea una nueva columna llamada label con el nombre legible de la variable 
-temp_idx = (vitals['itemid'] == 223761) & (vitals['valuenum'] > 80)
-vitals.loc[temp_idx, 'valuenum'] = (vitals.loc[temp_idx, 'valuenum'] - 32) * (5/9)
-#Convertir temperaturas sospechosamente altas (>80) de Fahrenheit a Celsius
-pivot = (vitals
-         .groupby(['subject_id', 'label'])['valuenum']
-         .mean()
-         .unstack())
-#Agrupa por subject_id (paciente) y label (variable), y calcula el promedio de los valores (valuenum), como resultado se obtiene una tabla con una fila por paciente y una columna por variable
-pivot = pivot.dropna(thresh=2)
-#Elimina a los pacientes que tengan menos de 2 de las 3 variables disponibles (para no trabajar con datos demasiado incompletos)
-def clasifica_riesgo(row):
-    return int(
-        (row.get('heart_rate', 0) > 90) or
-        (row.get('heart_rate', 0) < 60) or
-        (row.get('spo2', 100) < 95) or
-        (row.get('temperature', 0) > 37.5) or
-        (row.get('temperature', 0) < 36)
-    )
-pivot['riesgo'] = pivot.apply(clasifica_riesgo, axis=1)
-#Define una función que analiza cada fila y devuelve: 1 (riesgo) si frecuencia cardíaca > 100 o SpO₂ < 95 o temperatura > 37.5 °C, y 0 si todo está dentro del rango normal, aplica la función a cada fila del DataFrame (axis=1) y guarda el resultado en la nueva columna riesgo
-pivot.to_csv("lib/predictionModel/dataset/mimic_demo_riesgo.csv")
+keep_ids = np.array(list(ITEMID_MAP), dtype=np.int32)
+with abrir_gz("lib/predictionModel/dataset/mimic-iv-clinical-database-demo-2.2/icu/chartevents.csv.gz") as f:
+    reader = pd.read_csv(f, compression=None,
+                         usecols=["subject_id", "itemid", "valuenum"],
+                         dtype={"subject_id": "int32", "itemid": "int32", "valuenum": "float32"},
+                         chunksize=1_000_000)
+    vitals = pd.concat([c[c['itemid'].isin(keep_ids)] for c in reader], ignore_index=True)
+#chartevents.csv (miles de registros de signos vitales por paciente) se lee por bloques de 1M filas y solo con las 3 columnas necesarias; de cada bloque se guardan únicamente las filas con los itemid que interesan, así nunca se tiene la tabla completa en memoria
+subj = vitals['subject_id'].to_numpy()
+itemid = vitals['itemid'].to_numpy()
+vn = vitals['valuenum'].to_numpy(np.float64)
+#Pasa las tres columnas a arrays de NumPy (valuenum en float64 para acumular las medias)
+mask = (itemid == 223761) & (vn > 80.0)
+np.subtract(vn, 32.0, where=mask, out=vn)
+np.multiply(vn, 5.0 / 9.0, where=mask, out=vn)
+#Convertir temperaturas sospechosamente altas (>80) de Fahrenheit a Celsius, en el mismo array y solo donde marca la máscara (sin copias temporales)
+ok = ~np.isnan(vn)
+subj, itemid, vn = subj[ok], itemid[ok], vn[ok]
+#Descarta las mediciones sin valor numérico (la media de pandas también las ignoraba)
+ITEMIDS = np.array(sorted(ITEMID_MAP), dtype=np.int32)
+COLS = [ITEMID_MAP[i] for i in ITEMIDS]
+label_idx = np.searchsorted(ITEMIDS, itemid)
+uniq, inv = np.unique(subj, return_inverse=True)
+clave = inv * len(COLS) + label_idx
+sums = np.bincount(clave, weights=vn,
+                   minlength=uniq.size * len(COLS)).reshape(uniq.size, len(COLS))
+counts = np.bincount(clave, minlength=uniq.size * len(COLS)).reshape(uniq.size, len(COLS))
+#Acumula en dos tablas densas (paciente x variable) la suma y el número de mediciones, con una sola clave compuesta paciente*3 + variable, sin agrupar con pandas
+medias = sums / np.maximum(counts, 1)
+medias[counts == 0] = np.nan
+keep = (counts > 0).sum(axis=1) >= 2
+pivot = pd.DataFrame(medias[keep], index=pd.Index(uniq[keep], name='subject_id'), columns=COLS)
+#Calcula el promedio de cada variable por paciente (NaN si no tiene mediciones) y elimina a los pacientes que tengan menos de 2 de las 3 variables disponibles (para no trabajar con datos demasiado incompletos), como resultado se obtiene una tabla con una fila por paciente y una columna por variable
+def columna(nombre, defecto):
+    return pivot[nombre].to_numpy() if nombre in pivot.columns else np.full(len(pivot), defecto)
+hr = columna('heart_rate', 0)
+sp = columna('spo2', 100)
+tc = columna('temperature', 0)
+pivot['riesgo'] = ((hr > 90) | (hr < 60) | (sp < 95) | (tc > 37.5) | (tc < 36)).astype(np.uint8)
+#Calcula el riesgo de todos los pacientes a la vez con operaciones de NumPy (sin recorrer fila a fila): 1 (riesgo) si frecuencia cardíaca > 90 o < 60, SpO₂ < 95 o temperatura > 37.5 °C o < 36 °C, y 0 si todo está dentro del rango normal; los NaN no cumplen ninguna condición y si falta una columna se usa un valor por defecto que no marca riesgo
+pacsv.write_csv(pa.Table.from_pandas(pivot.reset_index()), "lib/predictionModel/dataset/mimic_demo_riesgo.csv")
 print("Archivo mimic_demo_riesgo.csv creado con éxito.")
-#Guarda el DataFrame procesado en un nuevo archivo mimic_demo_riesgo.csv y muestra un mensaje en consola para confirmar que todo fue bien
+#Guarda el DataFrame procesado (con subject_id como primera columna) en un nuevo archivo mimic_demo_riesgo.csv con el escritor CSV de Arrow en C++ y muestra un mensaje en consola para confirmar que todo fue bien
 
 
@@ -0,0 +1,92 @@
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Cuantiza los pesos del modelo a INT8 para la inferencia en MicroPython (pesos_modelo.py).
+#  - Pesos: INT8 simétrico con una escala por capa  ->  W ≈ W_q * s
+#    salvo la capa 1, con 12 bits (±2047, array('h') en el dispositivo): son solo 96 pesos
+#    y, con entradas en los extremos del recorte (T=25 °C queda a ~-23 desviaciones), su
+#    redondeo a INT8 dominaba el error (hasta 0.19 de probabilidad).
+#  - Activaciones (entrada de cada capa): enteros con una escala por capa  ->  x ≈ x_q * sx
+#    Se usa el rango de 16 bits (±32767): los productos x_q * W_q siguen siendo enteros
+#    pequeños para MicroPython y el error en el logit es ~5x menor que con 8 bits.
+#  - Bias: float, se suma una vez por neurona tras multiplicar por s * sx.
+#  - La capa 1 se vuelve a "desplegar" (entrada estandarizada): con las features en
+#    bruto (~97, ~80, ~37) el error de redondeo de W1 se multiplica por valores grandes.
+#  - Los rangos de las activaciones se calibran con filas del dataset MÁS una rejilla que
+#    cubre todo el rango al que main.py recorta las entradas: fuera del rango calibrado
+#    x_q pasa de ±32767 y los acumuladores int32 de matvec_q desbordan.
+
+base = Path("lib/predictionModel/modeloIA")
+RUTA_CALIBRACION = "lib/predictionModel/dataset/dataset_final_entrenamiento.csv"
+FEATS = ["spo2", "heart_rate", "temperature"]
+ACT_MAX = 32767
+W_MAX = [2047, 127, 127]   # máximo |W_q| por capa (capa 1 con 12 bits, resto INT8)
+N_CALIBRACION = 5000
+# Rango de entrada en el dispositivo (recortes de main.py: SPO2_MIN/MAX, BPM_MIN/MAX, temp)
+RANGO_DISPOSITIVO = {"spo2": (70, 100), "heart_rate": (40, 110), "temperature": (25.0, 45.0)}
+PASOS_REJILLA = {"spo2": 31, "heart_rate": 71, "temperature": 81}
+
+# ==== 1. Pesos en float y escala del StandardScaler ====
+with np.load(base / "pesos.npz") as d:
+    W1, b1, W2, b2, W3, b3 = [d[k].astype(np.float64) for k in ("W1", "b1", "W2", "b2", "W3", "b3")]
+with np.load(base / "escala.npz") as e:
+    mean, scale = e["mean"], e["scale"]
+
+# Deshacer el plegado de la estandarización en la capa 1
+W1 = W1 * scale[:, None]
+b1 = b1 + mean @ (W1 / scale[:, None])
+capas = [(W1, b1), (W2, b2), (W3, b3)]
+
+# ==== 2. Datos de calibración para el rango de las activaciones ====
+X = pd.read_csv(RUTA_CALIBRACION, usecols=FEATS)[FEATS].dropna().to_numpy(np.float64)
+X = X[np.random.default_rng(42).choice(len(X), size=min(N_CALIBRACION, len(X)), replace=False)]
+rejilla = np.meshgrid(*[np.linspace(*RANGO_DISPOSITIVO[f], PASOS_REJILLA[f]) for f in FEATS],
+                      indexing="ij")
+X_rejilla = np.stack([r.ravel() for r in rejilla], axis=1)
+X = np.concatenate([X, X_rejilla])
+X_std = (X - mean) / scale
+
+# ==== 3. Cuantizar capa a capa ====
+salida = []
+a = X_std
+for k, (W, b) in enumerate(capas):
+    s_w = float(np.abs(W).max()) / W_MAX[k]
+    W_q = np.round(W / s_w).astype(np.int16)
+    s_x = float(np.abs(a).max()) / ACT_MAX
+    # matvec_q acumula en int32: |x_q| <= ACT_MAX en todo el rango calibrado
+    assert ACT_MAX * int(np.abs(W_q).sum(axis=0).max()) < 2**31, f"capa {k + 1}: desborda int32"
+    salida.append({"W": W_q.tolist(), "s": s_w, "b": b.tolist(), "sx": s_x})
+
+    # Siguiente entrada = salida de esta capa en float (ReLU en las ocultas)
+    a = a @ W + b
+    if k < len(capas) - 1:
+        a = np.maximum(a, 0)
+z_float = a.ravel()
+
+# ==== 4. Comprobar contra el modelo en float ====
+def forward_q(X):
+    x = (X - mean) / scale
+    for k, c in enumerate(salida):
+        W_q = np.asarray(c["W"], dtype=np.int64)
+        x_q = np.round(x / c["sx"]).astype(np.int64)
+        x = (x_q @ W_q) * (c["s"] * c["sx"]) + np.asarray(c["b"])
+        if k < len(salida) - 1:
+            x = np.maximum(x, 0)
+    return x.ravel()
+
+z_q = forward_q(X)
+sigmoide = lambda z: 1 / (1 + np.exp(-z))
+n_datos = len(X) - len(X_rejilla)
+for nombre, sel in (("datos", slice(None, n_datos)), ("rejilla", slice(n_datos, None))):
+    zf, zq = z_float[sel], z_q[sel]
+    print(f"[{nombre}] n={len(zf)}  máx. |Δlogit| = {np.abs(zf - zq).max():.4g}  "
+          f"máx. |Δprob| = {np.abs(sigmoide(zf) - sigmoide(zq)).max():.4f}  "
+          f"acuerdo de clase = {np.mean((zf >= 0) == (zq >= 0)):.4%}")
+
+# ==== 5. Guardar ====
+with open(base / "pesos_int8.json", "w") as f:
+    json.dump({"mean": mean.tolist(), "inv_scale": (1.0 / scale).tolist(), "capas": salida},
+              f, separators=(",", ":"))
+print("OK: Generado pesos_int8.json")
@@ -30,6 +30,65 @@ SSD1306_CHARGEPUMP       = 0x8D
 SSD1306_EXTERNALVCC      = 0x1
 SSD1306_SWITCHCAPVCC     = 0x2
 
+# ---------------------  Escalado de bitmaps  ---------------------
+# Buffer del glifo 8x8 que se dibuja con framebuf.text antes de ampliarlo
+_GLYPH    = bytearray(8)
+_GLYPH_FB = framebuf.FrameBuffer(_GLYPH, 8, 8, framebuf.MONO_VLSB)
+
+_EXPAND  = {} # escala -> tabla de 256 entradas
+_SCRATCH = {} # (ancho, alto) -> (bytearray, FrameBuffer) reutilizables
+
+def _expand_table(s):
+    """Tabla que repite s veces cada bit de un byte (una columna MONO_VLSB)."""
+    t = _EXPAND.get(s)
+    if t is None:
+        mask = (1 << s) - 1
+        t = []
+        for b in range(256):
+            v = 0
+            for k in range(8):
+                if b & (1 << k):
+                    v |= mask << (k * s)
+            t.append(v)
+        _EXPAND[s] = t
+    return t
+
+def _scratch(w, h):
+    """Buffer destino del escalado; _blit_escalado reescribe todos sus bytes."""
+    par = _SCRATCH.get((w, h))
+    if par is None:
+        buf = bytearray(w * h // 8)
+        par = (buf, framebuf.FrameBuffer(buf, w, h, framebuf.MONO_VLSB))
+        _SCRATCH[(w, h)] = par
+    return par
+
+# ---------------------  Iconos precompilados  ---------------------
+# Se generan una sola vez al importar (MONO_VLSB) y se dibujan con un único blit
+_HEART = (
+    (0, 1, 1, 0, 1, 1, 0),
+    (1, 1, 1, 1, 1, 1, 1),
+    (1, 1, 1, 1, 1, 1, 1),
+    (1, 1, 1, 1, 1, 1, 1),
+    (0, 1, 1, 1, 1, 1, 0),
+    (0, 0, 1, 1, 1, 0, 0),
+)
+# Corazón 7x6: un byte por columna, bit dy = fila dy
+HEART_BUF = bytearray(sum(fila[dx] << dy for dy, fila in enumerate(_HEART)) for dx in range(7))
+HEART_FB  = framebuf.FrameBuffer(HEART_BUF, 7, 8, framebuf.MONO_VLSB)
+
+# Termómetro 5x13 (dos páginas): bulbo, vara y parte superior
+THERMO_BUF = bytearray(5 * 2)
+THERMO_FB  = framebuf.FrameBuffer(THERMO_BUF, 5, 16, framebuf.MONO_VLSB)
+THERMO_FB.fill_rect(2, 10, 3, 3, 1)
+THERMO_FB.vline(3, 2, 8, 1)
+THERMO_FB.fill_rect(2, 0, 3, 2, 1)
+
+# Oxígeno 16x10 (dos páginas): letra O y número 2
+OXYGEN_BUF = bytearray(16 * 2)
+OXYGEN_FB  = framebuf.FrameBuffer(OXYGEN_BUF, 16, 16, framebuf.MONO_VLSB)
+OXYGEN_FB.ellipse(4, 6, 3, 3, 1)
+OXYGEN_FB.text("2", 8, 2, 1)
+
 # ---------------------  Clase mejorada  ---------------------
 class SSD1306:
     """Controlador SSD1306 con autochequeo de presencia.
@@ -37,6 +96,8 @@ class SSD1306:
     • self.connected  -> True si la pantalla respondió.
     • is_connected()  -> Método auxiliar.
     • Si no hay pantalla, las funciones de dibujo no hacen nada.
+    • defer_show = True -> display_* no bloquea enviando el frame entero: solo lo marca
+      y flush_page() manda una página por llamada (desde el bucle principal).
     """
     def __init__(self, width=128, height=64, i2c=None, addr=SSD1306_I2C_ADDRESS):
         self.width     = width
@@ -53,19 +114,27 @@ class SSD1306:
         # --- ¿Pantalla presente? ---
         self.connected = self._detect_display()
 
+        # Última pantalla completa dibujada por display_*: si se pide la misma, no se
+        # repinta ni se vuelven a enviar los 512/1024 bytes por I²C
+        self._last_draw = None
+
         # Buffer y framebuf se crean siempre; así el código que escribe
         # texto/dibujos no revienta, aunque luego no se envíe a HW
         self.buffer   = bytearray(self.pages * self.width) # crea una zona de memoria donde se dibuja antes de mandar los datos a la pantalla
         self.framebuf = framebuf.FrameBuffer(self.buffer, self.width,
                                              self.height, framebuf.MONO_VLSB) # crea un objeto gráfico sobre ese buffer
 
+        # Envío diferido por páginas: página pendiente (-1 = nada) y búfer 0x40 + una página
+        self.defer_show = False
+        self._page      = -1
+        self._page_buf  = bytearray(self.width + 1)
+        self._page_buf[0] = 0x40
+
         if self.connected:
             self._init_display()
         else:
             # Convertir llamadas críticas en NOP
-            self.write_cmd  = self._noop # función vacía
-            self.write_data = self._noop
-            self.show       = self._noop
+            self._disconnect()
             # Opcional: avisar 1 sola vez
             print("[SSD1306] Pantalla no detectada; se omitirá salida gráfica.")
 
@@ -82,6 +151,15 @@ class SSD1306:
         """Función vacía para sustituir I/O cuando no hay pantalla."""
         pass
 
+    def _disconnect(self):
+        """Marca la pantalla como ausente y sustituye la E/S por NOP."""
+        self.connected  = False
+        self._page      = -1
+        self.write_cmd  = self._noop # función vacía
+        self.write_cmds = self._noop
+        self.write_data = self._noop
+        self.show       = self._noop
+
     def is_connected(self):
         """Devuelve True/False según la presencia del display."""
         return self.connected
@@ -106,8 +184,7 @@ class SSD1306:
             SSD1306_NORMALDISPLAY,
             SSD1306_DISPLAYON
         ]
-        for cmd in cmds:
-            self.write_cmd(cmd)
+        self.write_cmds(*cmds) # una sola transacción I²C para toda la secuencia
         self.clear()
         self.show()
 
@@ -117,79 +194,121 @@ class SSD1306:
             self.i2c.writeto(self.addr, bytes([0x80, cmd]))
         except OSError:
             # Cable suelto durante la marcha → Marcar como desconectado
-            self.connected = False
-            self.write_cmd = self._noop
-            self.write_data = self._noop
-            self.show = self._noop
+            self._disconnect()
+
+    def write_cmds(self, *cmds):
+        """Varios comandos en una única escritura I²C: 0x80 (Co=1, D/C#=0) antes de cada uno."""
+        buf = bytearray(2 * len(cmds))
+        for i, cmd in enumerate(cmds):
+            buf[2 * i] = 0x80
+            buf[2 * i + 1] = cmd
+        try:
+            self.i2c.writeto(self.addr, buf)
+        except OSError:
+            self._disconnect()
 
     def write_data(self, buf):
         try:
             self.i2c.writeto(self.addr, b'\x40' + buf)
         except OSError:
-            self.connected = False
-            self.write_cmd = self._noop
-            self.write_data = self._noop
-            self.show = self._noop
+            self._disconnect()
 
     # ---------- API de usuario ----------
     def clear(self):
         self.framebuf.fill(0)
+        self._last_draw = None
+
+    def _same_screen(self, key):
+        """True si la última pantalla dibujada es la misma; si no, la anota (tras clear)."""
+        if key == self._last_draw:
+            return True
+        self.clear()
+        self._last_draw = key
+        return False
 
     def show(self):
-        self.write_cmd(SSD1306_COLUMNADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.width - 1)
-        self.write_cmd(SSD1306_PAGEADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
+        self._page = -1 # el frame completo sustituye a cualquier envío por páginas a medias
+        self.write_cmds(SSD1306_COLUMNADDR, 0, self.width - 1,
+                        SSD1306_PAGEADDR, 0, self.pages - 1)
         self.write_data(self.buffer) # envía todos los píxeles almacenados en el buffer
 
+    def _present(self):
+        """Final de display_*: frame completo ahora, o envío por páginas si defer_show."""
+        if not self.defer_show:
+            self.show()
+        elif self.connected:
+            self._page = 0
+
+    def flush_page(self):
+        """Envía la siguiente página pendiente (width bytes, ~3 ms a 400 kHz).
+        Devuelve True mientras queden páginas por enviar."""
+        p = self._page
+        if p < 0:
+            return False
+        w = self.width
+        if p == 0:
+            # Ventana completa: en modo horizontal el puntero avanza solo de una página a la siguiente
+            self.write_cmds(SSD1306_COLUMNADDR, 0, w - 1,
+                            SSD1306_PAGEADDR, 0, self.pages - 1)
+        self._page_buf[1:] = memoryview(self.buffer)[p * w:(p + 1) * w]
+        try:
+            self.i2c.writeto(self.addr, self._page_buf)
+        except OSError:
+            self._disconnect()
+            return False
+        p += 1
+        self._page = p if p < self.pages else -1
+        return self._page >= 0
+
     def text(self, string, x, y, color=1):
         self.framebuf.text(string, x, y, color)
 
     def text_scaled(self, string, x, y, scale=1, color=1):
         """Renderiza texto escalado"""
+        if scale == 1:
+            self.framebuf.text(string, x, y, color)
+            return
         for char in string:
-            # Buffer temporal para el caracter
-            char_width = 8
-            char_height = 8
-            buf_temp = bytearray(char_width * char_height // 8)
-            fb_temp = framebuf.FrameBuffer(buf_temp, char_width, char_height, framebuf.MONO_VLSB) # crea un mini-framebuffer para dibujar sólo ese carácter
-            
-            # Renderizar caracter
-            fb_temp.fill(0)
-            fb_temp.text(char, 0, 0, color)
-            
-            # Transferir con escala
-            for py in range(char_height):
-                for px in range(char_width):
-                    if fb_temp.pixel(px, py):
-                        self.framebuf.fill_rect(
-                            x + px * scale,
-                            y + py * scale,
-                            scale, scale, color)
-            
-            x += char_width * scale # mueve la posición horizontal para escribir el siguiente carácter
+            # Glifo 8x8 en MONO_VLSB: 8 bytes, uno por columna
+            _GLYPH_FB.fill(0)
+            _GLYPH_FB.text(char, 0, 0, color)
+            self._blit_escalado(_GLYPH, 8, 1, x, y, scale)
+            x += 8 * scale # mueve la posición horizontal para escribir el siguiente carácter
+
+    def _blit_escalado(self, src, ancho, paginas, x, y, s):
+        """Amplía un bitmap MONO_VLSB (ancho x 8*paginas) por s con la tabla de
+        expansión y lo copia con un único blit (los bits a 0 no se dibujan)."""
+        expand = _expand_table(s)
+        w = ancho * s
+        dst, fb = _scratch(w, 8 * paginas * s)
+        for i in range(ancho):
+            for p in range(paginas):
+                v = expand[src[p * ancho + i]] # columna de 8 píxeles -> 8*s bits
+                for q in range(s):
+                    b = (v >> (8 * q)) & 0xFF
+                    base = (p * s + q) * w + i * s
+                    for r in range(s): # cada columna origen ocupa s columnas destino
+                        dst[base + r] = b
+        self.framebuf.blit(fb, x, y, 0)
     
     def draw_heart(self, x, y, size=1, color=1):
-        """Corazón optimizado"""
-        heart = [
-            [0, 1, 1, 0, 1, 1, 0],
-            [1, 1, 1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1, 1, 1],
-            [0, 1, 1, 1, 1, 1, 0],
-            [0, 0, 1, 1, 1, 0, 0],
-        ]
-        
-        for dy, row in enumerate(heart):
-            for dx, pixel in enumerate(row):
-                if pixel:
-                    self.framebuf.fill_rect(x + dx*size, y + dy*size, size, size, color)
+        """Corazón precompilado (HEART_FB)"""
+        if not color:
+            # Borrado (poco frecuente): celda a celda sobre el patrón original
+            for dy, row in enumerate(_HEART):
+                for dx, pixel in enumerate(row):
+                    if pixel:
+                        self.framebuf.fill_rect(x + dx*size, y + dy*size, size, size, 0)
+        elif size == 1:
+            self.framebuf.blit(HEART_FB, x, y, 0)
+        else:
+            self._blit_escalado(HEART_BUF, 7, 1, x, y, size)
     
     def display_parameter(self, param_name, value, unit, icon=None):
         """Muestra parámetro con diseño mejorado"""
-        self.clear()
+        value_str = "{:.1f}".format(value) if isinstance(value, float) else str(value)
+        if self._same_screen(("param", param_name, value_str, unit, icon)):
+            return
         
         # Título superior
         self.text("Monitor Salud", 35, 2)
@@ -210,7 +329,6 @@ class SSD1306:
         self.text(param_name, param_x, 16)
         
         # Valor principal (doble tamaño)
-        value_str = "{:.1f}".format(value) if isinstance(value, float) else str(value)
         value_x = max(0, (self.width - len(value_str) * 16) // 2) # calcula dónde poner el valor centrado, teniendo en cuenta que está a escala 2
         self.text_scaled(value_str, value_x, 28, scale=2, color=1)
         
@@ -221,26 +339,19 @@ class SSD1306:
         unit_x = max(0, (self.width - len(unit) * 8) // 2)
         self.text(unit, unit_x, 50)
         
-        self.show()
+        self._present()
     
     def draw_thermometer(self, x, y):
-        """Termómetro optimizado"""
-        # Bulbo
-        self.framebuf.fill_rect(x+2, y+10, 3, 3, 1)
-        # Vara
-        self.framebuf.vline(x+3, y+2, 8, 1)
-        # Parte superior
-        self.framebuf.fill_rect(x+2, y, 3, 2, 1)
+        """Termómetro precompilado (THERMO_FB)"""
+        self.framebuf.blit(THERMO_FB, x, y, 0)
     
     def draw_oxygen(self, x, y):
-        """Icono de oxígeno optimizado"""
-        # Letra O
-        self.framebuf.ellipse(x+4, y+6, 3, 3, 1)
-        # Número 2
-        self.framebuf.text("2", x+8, y+2, 1)
+        """Icono de oxígeno precompilado (OXYGEN_FB)"""
+        self.framebuf.blit(OXYGEN_FB, x, y, 0)
     
     def display_finger_message(self):
-        self.clear()
+        if self._same_screen(("finger",)):
+            return
 
         title = "Saude Remota"
         self.text(title, (self.width - len(title) * 8) // 2, 0)
@@ -251,34 +362,36 @@ class SSD1306:
         self.text(line1, (self.width - len(line1) * 8) // 2, 12)
         self.text(line2, (self.width - len(line2) * 8) // 2, 22)
 
-        self.show()
+        self._present()
 
     def display_weak_signal(self):
         """Mensaje de señal débil"""
-        self.clear()
+        if self._same_screen(("weak",)):
+            return
         self.text("Señal debil", 25, 10)
         self.text_scaled("AJUSTE", 35, 20, scale=2)
         self.text("la posicion", 25, 45)
-        self.show()
+        self._present()
     
     def display_values(self, spo2=None, bpm=None, temp=None):
-        self.clear()
-
         spo2_txt = "SpO2:{:>3} %".format("--" if spo2 is None else spo2)
         bpm_txt  = "BPM :{:>3}".format("--" if bpm is None else bpm)
         temp_txt = "Temp:{:>4.1f} C".format(temp) if temp is not None else "Temp: --.- C"
 
         lines = [spo2_txt, bpm_txt, temp_txt]
+        if self._same_screen(lines):
+            return
         ys = [8, 16, 24]
 
         for line, y in zip(lines, ys):
             x = (self.width - len(line) * 8) // 2
             self.text(line, x, y)
 
-        self.show()
+        self._present()
 
     def display_risk(self, risk=False):
-        self.clear()
+        if self._same_screen(("risk", bool(risk))):
+            return
 
         title = "RIESGO"
         self.text(title, (self.width - len(title) * 8) // 2, 0)
@@ -290,4 +403,4 @@ class SSD1306:
 
         self.text_scaled(msg, (self.width - len(msg) * 16) // 2, 12, scale=2)
 
-        self.show()
\ No newline at end of file
+        self._present()
\ No newline at end of file
@@ -1,36 +1,42 @@
 #main.py — MAX30102 + OLED (opcional) + IA + BLE
-#envío BLE continuo (keep-alive 1 Hz) y, cuando hay medidas válidas, BLE + IA + REGLAS
+#envío BLE desde el propio bucle del sensor (sin temporizadores) cuando hay medidas válidas: BLE + IA + REGLAS
 
 import sys #sys: utilidades del sistema
+import micropython
+from micropython import const #las constantes enteras se sustituyen por su valor al compilar
 import utime as time #módulo de tiempo de MicroPython, renombrado a time
+from array import array
 from machine import I2C, Pin
 
-#sensores
-from lib.max30102 import MAX30105
-from lib.max30102.heartrate import HeartRate
-from lib.max30102.oxygen import OxygenSaturation
-#(opcional) comenta si no tienes pantalla:
-from lib.ssd1306.ssd1306 import SSD1306
+#módulos opcionales: con 0 el compilador elimina el import y el módulo no se carga al arrancar
+ENABLE_DISPLAY    = const(1) #pantalla OLED
+ENABLE_IA         = const(1) #modelo IA (con 0 solo se aplican las reglas clínicas)
+
+#sensores: paquete de nivel superior para usar la copia congelada (manifest.py) si existe; si no, se carga de /lib
+from max30102 import MAX30105, HeartRate, OxygenSaturation
+if ENABLE_DISPLAY:
+    from lib.ssd1306.ssd1306 import SSD1306
 
 #BLE
 from lib.BLERawSender import BLERawSender 
 
 #modelo IA
-from lib.predictionModel.modeloIA.pesos_modelo import predict
+if ENABLE_IA:
+    from lib.predictionModel.modeloIA.pesos_modelo import predict
 
 #configuración
 DEVICE_NAME       = "ESP32-SaudeRemota"
 I2C_SCL_PIN       = 22
 I2C_SDA_PIN       = 21
 BUTTON_PIN        = 0
+SENSOR_INT_PIN    = None #GPIO conectado al pin INT del MAX30102; None si no está cableado (se sondea por I²C)
 
 SAMPLE_RATE       = 100 
 LED_POWER         = 0x9F
-FINGER_ON         = 52000      #histeresis entrada para evitar parpadeos al colocar el dedo
-FINGER_OFF        = 48000      #histeresis salida
-AMP_MIN           = 500
+FINGER_ON         = const(52000)     #histeresis entrada para evitar parpadeos al colocar el dedo
+FINGER_OFF        = const(48000)     #histeresis salida
+AMP_MIN           = const(500)
 UI_REFRESH_MS     = 500
-BLE_KEEPALIVE_MS  = 1000
 BLE_SEND_MS       = 2000
 SCREEN_UPDATE_MS  = 2000
 
@@ -39,7 +45,7 @@ HISTORY_LEN       = 5          #media móvil (BPM/SpO2)
 MED_WIN           = 8          #mediana para BPM
 MAX_BPM_JUMP      = 20         #anti-spike por ciclo (lpm)
 MAX_SPO2_JUMP     = 5          #anti-spike por ciclo (%)
-WARMUP_MS         = 3000       #no usar medidas los 3s iniciales tras detectar dedo
+WARMUP_MS         = const(3000)      #no usar medidas los 3s iniciales tras detectar dedo
 
 #temperatura (offset y suavizado)
 TEMP_OFFSET       = 3         #para corregir las lecturas iniciales más bajas
@@ -54,64 +60,111 @@ BPM_LO,  BPM_HI  = 60, 100
 SPO2_LO          = 95
 
 PRINT_SERIAL      = True #activa mensajes por consola
+PRINT_DEBUG       = const(0) #1: trazas por latido y por ventana de SpO2; con 0 el compilador elimina esos bloques
 
 #estado global
 stop_flag = False
 last_beat_ms = 0
 last_good_bpm = 0
-spo2_ir_buf = []
-spo2_red_buf = []
 finger_present = False
+finger_threshold = FINGER_ON #umbral activo de la histéresis: FINGER_ON sin dedo, FINGER_OFF con dedo
 finger_since_ms = 0
-min_ir = 100000
-last_ble_send_ms = 0
+min_ir = array('i', [100000]) #mínimo IR con dedo; array para que push_sample lo actualice sin global
 last_valid_bpm_ms = 0
 last_calc_ms = 0
 sample_counter = 0
 last_beat_sample = None
-CALC_INTERVAL_MS = 500
+CALC_INTERVAL_MS = const(500)
 BPM_BOOTSTRAP_SAMPLES = 3
 BPM_BOOTSTRAP_RANGE = 25
-SENSOR_SAMPLE_RATE = 400
-SAMPLE_AVERAGE = 4
-EFFECTIVE_SAMPLE_RATE = SENSOR_SAMPLE_RATE // SAMPLE_AVERAGE
+SENSOR_SAMPLE_RATE = const(400)
+SAMPLE_AVERAGE = const(4)
+EFFECTIVE_SAMPLE_RATE = const(SENSOR_SAMPLE_RATE // SAMPLE_AVERAGE)
+BEAT_BPM_NUM = const(60 * EFFECTIVE_SAMPLE_RATE) #BPM = BEAT_BPM_NUM / muestras entre latidos (plegado al compilar)
 
 spo2 = 0
 bpm  = 0
 temp = 0.0
 spo2_valid = False
 bpm_valid  = False
-label, y = predict([spo2, bpm, temp])
-
-last_ui_ms = time.ticks_ms()
-last_ble_keepalive_ms = time.ticks_ms()
-last_ble_send_ms = time.ticks_ms()
-last_screen_update_ms = time.ticks_ms()
-screen_mode = 0
-last_risk_label = 0
 
 #historiales para suavizado
-SPO2_HISTORY = []
-BPM_HISTORY  = []
-TEMP_HISTORY = []
-BPM_RAW_HISTORY = []  #para mediana
-
-def push_and_mean(value, history, maxlen):
-    history.append(value)
-    if len(history) > maxlen:
-        history.pop(0)
-    return sum(history) / len(history) #devuelve la media 
+class MovingAverage:
+    """Media móvil de ventana fija: buffer circular array('f') y suma acumulada (O(1) por muestra)."""
+    def __init__(self, maxlen):
+        self._buf = array('f', [0.0] * maxlen)
+        self._maxlen = maxlen
+        self.clear()
+
+    def clear(self):
+        self._n = 0   #muestras en la ventana
+        self._i = 0   #siguiente posición a escribir
+        self._sum = 0.0
+
+    def __len__(self):
+        return self._n
+
+    def last(self):
+        return self._buf[self._i - 1] #con _i == 0 y la ventana llena, -1 es la última posición
+
+    @micropython.native
+    def push(self, value):
+        """Añade value (descartando la más antigua si la ventana está llena) y devuelve la media."""
+        buf = self._buf
+        i = self._i
+        if self._n == self._maxlen:
+            self._sum -= buf[i]
+        else:
+            self._n += 1
+        buf[i] = value
+        self._sum += value
+        i += 1
+        if i == self._maxlen:
+            i = 0
+            self._sum = sum(buf) #una vez por vuelta se recalcula exacta para no acumular redondeo
+        self._i = i
+        return self._sum / self._n #devuelve la media
+
+SPO2_HISTORY = MovingAverage(8)
+BPM_HISTORY  = MovingAverage(10)
+TEMP_HISTORY = MovingAverage(HISTORY_LEN)
+BPM_RAW_HISTORY = []  #para mediana; con MED_WIN valores pasa a ser un anillo (la mediana no depende del orden)
+bpm_raw_wr = 0        #posición del valor más antiguo en BPM_RAW_HISTORY una vez lleno
 
 def median(xs):
     s = sorted(xs)
     n = len(s)
     return s[n//2] if n % 2 == 1 else 0.5*(s[n//2-1] + s[n//2]) #devuelve la mediana (promedio de los 2 centrales si es un número par)
 
+@micropython.native
 def clamp(v, lo, hi):
     if v < lo: return lo
     if v > hi: return hi
     return v
 
+@micropython.viper
+def clamp_i(v: int, lo: int, hi: int) -> int:
+    #clamp para enteros (sin objetos float); con límites enteros clamp_i(round(v)) == round(clamp(v))
+    if v < lo: return lo
+    if v > hi: return hi
+    return v
+
+@micropython.viper
+def push_sample(a: ptr32, b: ptr32, i: int, va: int, vb: int, size: int, st: ptr32, amp: int) -> int:
+    #st[0] guarda el mínimo IR visto con el dedo puesto y se actualiza aquí mismo; si la amplitud
+    #va - mínimo supera amp, escribe va/vb en la posición i de los anillos y devuelve la siguiente
+    #posición. Con poca amplitud no escribe nada y devuelve -1
+    if va < st[0]:
+        st[0] = va
+    if va - st[0] <= amp:
+        return -1
+    a[i] = va
+    b[i] = vb
+    i += 1
+    if i == size:
+        i = 0
+    return i
+
 def log(*a):
     if PRINT_SERIAL:
         try: print(*a)
@@ -151,68 +204,101 @@ sensor.setup(
     pulseWidth    = 411,
     adcRange      = 16384
 )
+if SENSOR_INT_PIN is not None:
+    #safeCheck espera al pin INT (una muestra nueva) con machine.idle() en vez de leer el FIFO cada 1 ms
+    sensor.attachDataReadyPin(SENSOR_INT_PIN)
+sensor.startTemperature() #primera conversión: lista para el primer refresco de la UI
 
-try:
-    display = SSD1306(width=128, height=32, i2c=i2c)
-except Exception:
-    display = None
+display = None
+if ENABLE_DISPLAY:
+    try:
+        display = SSD1306(width=128, height=32, i2c=i2c)
+    except Exception:
+        display = None
 if display and display.is_connected():
     display.display_finger_message()
+    #a partir de aquí los display_* solo marcan el frame y el bucle lo envía página a página
+    display.defer_show = True
 
 hr = HeartRate()
 ox = OxygenSaturation(sample_rate_hz=EFFECTIVE_SAMPLE_RATE)
 SPO2_BUF_SIZE = ox.BUFFER_SIZE
 
+#buffers circulares de tamaño fijo para SpO2 (sin pop(0) ni realocaciones por muestra)
+#'i' y no 'H': las muestras del FIFO son de 18 bits
+spo2_ir_buf  = array('i', [0] * SPO2_BUF_SIZE)
+spo2_red_buf = array('i', [0] * SPO2_BUF_SIZE)
+spo2_wr      = 0 #siguiente posición a escribir (la más antigua cuando el buffer está lleno)
+spo2_filled  = 0 #muestras válidas en el buffer
+#copias lineales (orden cronológico) que recibe el algoritmo de SpO2; se reutilizan en cada cálculo
+spo2_ir_lin  = array('i', [0] * SPO2_BUF_SIZE)
+spo2_red_lin = array('i', [0] * SPO2_BUF_SIZE)
+#vistas sin copia para desenrollar el anillo sobre las copias lineales
+spo2_ir_mv,  spo2_ir_lin_mv  = memoryview(spo2_ir_buf),  memoryview(spo2_ir_lin)
+spo2_red_mv, spo2_red_lin_mv = memoryview(spo2_red_buf), memoryview(spo2_red_lin)
+
 ble = BLERawSender(device_name=DEVICE_NAME, auto_wait_ms=0)
 log("BLE anunciando como", DEVICE_NAME)
 log("Sensor inicializado. Coloque su dedo…")
 
 #lectura/cálculo
-def read_and_update():
-    """Lee IR/Red, actualiza buffers y calcula spo2/bpm si hay ventana completa."""
-    global finger_present, finger_since_ms, min_ir, spo2, bpm, spo2_valid, bpm_valid, last_good_bpm
+def read_and_update(_available=sensor.available, _safe_check=sensor.safeCheck,
+                    _get_ir=sensor.getFIFOIR, _get_red=sensor.getFIFORed,
+                    _next_sample=sensor.nextSample, _check_beat=hr.check_for_beat,
+                    _ticks_ms=time.ticks_ms, _ticks_diff=time.ticks_diff,
+                    _push_sample=push_sample, _ir_ring=spo2_ir_buf, _red_ring=spo2_red_buf,
+                    _ring_size=SPO2_BUF_SIZE, _min_ir=min_ir):
+    """Lee IR/Red, actualiza buffers y calcula spo2/bpm si hay ventana completa.
+    Los argumentos por defecto (no se pasan nunca) enlazan una sola vez los métodos que se
+    llaman en cada muestra, y también los anillos de SpO2, su tamaño y el mínimo IR (objetos fijos): dentro
+    de la función son variables locales, sin buscar en los globales ni en el objeto."""
+    global finger_present, finger_threshold, finger_since_ms, spo2, bpm, spo2_valid, bpm_valid, last_good_bpm
     global last_beat_ms
     global last_valid_bpm_ms
     global last_calc_ms
     global sample_counter, last_beat_sample
+    global spo2_wr, spo2_filled, bpm_raw_wr
 
     #Si el búfer local está vacío, descargar nuevas muestras del FIFO
-    if sensor.available() == 0:
+    if _available() == 0:
 
-        if not sensor.safeCheck(250):
+        if not _safe_check(250):
             return False, False
 
     #Procesar la muestra pendiente más antigua, no únicamente la última
-    ir = sensor.getFIFOIR()
-    red = sensor.getFIFORed()
+    ir = _get_ir()
+    red = _get_red()
 
     #Marcar la muestra como consumida
-    sensor.nextSample()
+    _next_sample()
 
     sample_counter += 1
+    now = _ticks_ms() #una sola lectura del reloj por muestra; se reutiliza en toda la función
 
-    has_finger = (ir > FINGER_OFF) if finger_present else (ir > FINGER_ON)
+    has_finger = ir > finger_threshold #una sola comparación; el umbral solo cambia al entrar/salir el dedo
 
     if has_finger:
         if not finger_present:
             log("Dedo detectado. Midiendo…")
             finger_present = True
-            finger_since_ms = time.ticks_ms()
-            min_ir = 100000
+            finger_threshold = FINGER_OFF
+            finger_since_ms = now
+            _min_ir[0] = 100000
 
             bpm = 0
             spo2 = 0
 
-            spo2_ir_buf.clear()
-            spo2_red_buf.clear()
+            spo2_wr = 0
+            spo2_filled = 0
             SPO2_HISTORY.clear()
             BPM_HISTORY.clear()
             BPM_RAW_HISTORY.clear()
+            bpm_raw_wr = 0
 
             last_beat_ms = 0
             last_good_bpm = 0
             last_valid_bpm_ms = 0
-            last_calc_ms = time.ticks_ms()
+            last_calc_ms = now
 
             sample_counter = 0
             last_beat_sample = None
@@ -222,29 +308,28 @@ def read_and_update():
             spo2_valid = False
 
         #Cálculo de BPM mediante detección de latidos de HeartRate
-        if hr.check_for_beat(ir):
+        if _check_beat(ir):
 
             #El primer latido únicamente establece la referencia
             if last_beat_sample is None:
                 last_beat_sample = sample_counter
-                print("Primer latido detectado por HeartRate")
+                if PRINT_DEBUG:
+                    print("Primer latido detectado por HeartRate")
         
             else: 
                 samples_between_beats = sample_counter - last_beat_sample
                 last_beat_sample = sample_counter
 
                 if samples_between_beats > 0:
-                    bpm_calc_hr = (
-                        60 * EFFECTIVE_SAMPLE_RATE
-                        / samples_between_beats
-                    )
-
-                    print(
-                        "HeartRate: muestras entre latidos =",
-                        samples_between_beats,
-                        "| BPM candidato =",
-                        bpm_calc_hr
-                    )
+                    bpm_calc_hr = BEAT_BPM_NUM / samples_between_beats
+
+                    if PRINT_DEBUG:
+                        print(
+                            "HeartRate: muestras entre latidos =",
+                            samples_between_beats,
+                            "| BPM candidato =",
+                            bpm_calc_hr
+                        )
 
                     if BPM_MIN <= bpm_calc_hr <= BPM_MAX:
 
@@ -252,18 +337,19 @@ def read_and_update():
                         if len(BPM_RAW_HISTORY) < BPM_BOOTSTRAP_SAMPLES:
                             BPM_RAW_HISTORY.append(bpm_calc_hr)
 
-                            print(
-                                "BPM inicial candidato =",
-                                bpm_calc_hr,
-                                "| muestras =",
-                                len(BPM_RAW_HISTORY)
-                            )
+                            if PRINT_DEBUG:
+                                print(
+                                    "BPM inicial candidato =",
+                                    bpm_calc_hr,
+                                    "| muestras =",
+                                    len(BPM_RAW_HISTORY)
+                                )
 
                             #Mostrar ya el primer BPM fisiológicamente válido para evitar que aparezca --- continuamente
                             bpm = median(BPM_RAW_HISTORY)
                             bpm_valid = True
                             last_good_bpm = bpm
-                            last_valid_bpm_ms = time.ticks_ms()
+                            last_valid_bpm_ms = now
 
                             #Comprobar coherencia al completar el inicio
                             if len(BPM_RAW_HISTORY) == BPM_BOOTSTRAP_SAMPLES:
@@ -279,162 +365,105 @@ def read_and_update():
                                     bpm = median(BPM_RAW_HISTORY)
                                     last_good_bpm = bpm
 
-                                    print(
-                                        "BPM inicial anómalo eliminado =",
-                                        valor_peor,
-                                        "| BPM mantenido =",
-                                        bpm
-                                    )
+                                    if PRINT_DEBUG:
+                                        print(
+                                            "BPM inicial anómalo eliminado =",
+                                            valor_peor,
+                                            "| BPM mantenido =",
+                                            bpm
+                                        )
                             
                                 else:
                                     
-                                    print(
-                                        "BPM inicial estabilizado =",
-                                        bpm
-                                    )
+                                    if PRINT_DEBUG:
+                                        print(
+                                            "BPM inicial estabilizado =",
+                                            bpm
+                                        )
                         #Fase estable: ya se reunieron las muestras iniciales
                         else:
                             bpm_referencia = median(BPM_RAW_HISTORY)
 
                             if abs(bpm_calc_hr - bpm_referencia) <= MAX_BPM_JUMP:
-                                BPM_RAW_HISTORY.append(bpm_calc_hr)
-
-                                if len(BPM_RAW_HISTORY) > MED_WIN:
-                                    BPM_RAW_HISTORY.pop(0)
+                                #sobrescribir el más antiguo en lugar de append + pop(0)
+                                if len(BPM_RAW_HISTORY) < MED_WIN:
+                                    BPM_RAW_HISTORY.append(bpm_calc_hr)
+                                else:
+                                    BPM_RAW_HISTORY[bpm_raw_wr] = bpm_calc_hr
+                                    bpm_raw_wr += 1
+                                    if bpm_raw_wr == MED_WIN:
+                                        bpm_raw_wr = 0
 
                                 bpm = median(BPM_RAW_HISTORY)
                                 bpm_valid = True
                                 last_good_bpm = bpm
-                                last_valid_bpm_ms = time.ticks_ms()
+                                last_valid_bpm_ms = now
 
-                                print(
-                                    "BPM por HeartRate filtrado =",
-                                    bpm
-                                )
+                                if PRINT_DEBUG:
+                                    print(
+                                        "BPM por HeartRate filtrado =",
+                                        bpm
+                                    )
 
                             else:
                                 bpm_valid = bpm != 0
 
-                                print(
-                                    "BPM HeartRate descartado por salto =",
-                                    bpm_calc_hr,
-                                    "| se mantiene =",
-                                    bpm
-                                )
+                                if PRINT_DEBUG:
+                                    print(
+                                        "BPM HeartRate descartado por salto =",
+                                        bpm_calc_hr,
+                                        "| se mantiene =",
+                                        bpm
+                                    )
     
                     else:
                         #Una detección fuera de rango no elimina el BPM anterior
                         bpm_valid = bpm != 0
 
-                        print(
-                            "BPM HeartRate fuera de rango =",
-                            bpm_calc_hr,
-                            "| se mantiene =",
-                            bpm
-                        )
-
-        if ir < min_ir:
-            min_ir = ir
+                        if PRINT_DEBUG:
+                            print(
+                                "BPM HeartRate fuera de rango =",
+                                bpm_calc_hr,
+                                "| se mantiene =",
+                                bpm
+                            )
 
-        strength = ir - min_ir
-        if strength > AMP_MIN:
-            spo2_ir_buf.append(ir)
-            spo2_red_buf.append(red)
-            if len(spo2_ir_buf) > SPO2_BUF_SIZE:
-                spo2_ir_buf.pop(0)
-                spo2_red_buf.pop(0) #mantiene el tamaño fijo eliminando el valor más antiguo
+        #mínimo IR, umbral de amplitud y escritura en los anillos en una sola llamada viper
+        #(sobrescribe el valor más antiguo; -1 si la amplitud no supera AMP_MIN)
+        wr = _push_sample(_ir_ring, _red_ring, spo2_wr, ir, red, _ring_size, _min_ir, AMP_MIN)
+        if wr >= 0:
+            spo2_wr = wr
+            if spo2_filled < _ring_size:
+                spo2_filled += 1
             if (
-                len(spo2_ir_buf) == SPO2_BUF_SIZE
-                and time.ticks_diff(time.ticks_ms(), last_calc_ms) >= CALC_INTERVAL_MS
+                spo2_filled == _ring_size
+                and _ticks_diff(now, last_calc_ms) >= CALC_INTERVAL_MS
             ):
-                last_calc_ms = time.ticks_ms()
+                last_calc_ms = now
+                #el algoritmo necesita las muestras en orden cronológico (de la más antigua a la más reciente):
+                #se desenrolla el anillo sobre los buffers lineales con memoryview, sin crear arrays nuevos
+                tail = _ring_size - spo2_wr
+                spo2_ir_lin_mv[:tail] = spo2_ir_mv[spo2_wr:]
+                spo2_ir_lin_mv[tail:] = spo2_ir_mv[:spo2_wr]
+                spo2_red_lin_mv[:tail] = spo2_red_mv[spo2_wr:]
+                spo2_red_lin_mv[tail:] = spo2_red_mv[:spo2_wr]
                 spo2_calc, sv, bpm_calc, bv = ox.calculate_spo2_and_heart_rate(
-                    spo2_ir_buf, spo2_red_buf
+                    spo2_ir_lin, spo2_red_lin
                 )
-                print("oxygen BPM =", bpm_calc, "valid =", bv)
-                #validación fisiológica previa
-                #if bv and (BPM_MIN <= bpm_calc <= BPM_MAX):
-
-                    #Fase inicial: reunir varias lecturas antes de fijar el BPM
-                    #if bpm == 0:
-                        #BPM_RAW_HISTORY.append(bpm_calc)
-
-                        #if len(BPM_RAW_HISTORY) > BPM_BOOTSTRAP_SAMPLES:
-                            #BPM_RAW_HISTORY.pop(0)
-
-                        #print("BPM inicial candidato =", bpm_calc,
-                            #"| muestras =", BPM_RAW_HISTORY)
-
-                        #if len(BPM_RAW_HISTORY) >= BPM_BOOTSTRAP_SAMPLES:
-                            #bpm_minimo = min(BPM_RAW_HISTORY)
-                            #bpm_maximo = max(BPM_RAW_HISTORY)
-
-                            #Solo se acepta si las lecturas iniciales son suficientemente coherentes
-                            #if bpm_maximo - bpm_minimo <= BPM_BOOTSTRAP_RANGE:
-                                #bpm = median(BPM_RAW_HISTORY)
-                                #bpm_valid = True
-                                #last_valid_bpm_ms = time.ticks_ms()
-
-                                #print("BPM inicial estabilizado =", bpm)
-                            #else:
-                                #Las lecturas son inestables: descartar la más alejada
-                                #bpm_central = median(BPM_RAW_HISTORY)
-
-                                #valor_peor = max(
-                                    #BPM_RAW_HISTORY,
-                                    #key=lambda valor: abs(valor - bpm_central)
-                                #)
-
-                                #BPM_RAW_HISTORY.remove(valor_peor)
-                                #bpm_valid = False
-
-                                #print("BPM inicial inestable. Eliminado =", valor_peor)
-
-                    #Fase estable: ya existe un BPM aceptado
-                    #else:
-                        #bpm_actual = median(BPM_RAW_HISTORY)
-
-                        #if abs(bpm_calc - bpm_actual) <= MAX_BPM_JUMP:
-                            #BPM_RAW_HISTORY.append(bpm_calc)
-
-                            #if len(BPM_RAW_HISTORY) > MED_WIN:
-                                #BPM_RAW_HISTORY.pop(0)
-
-                            #bpm = median(BPM_RAW_HISTORY)
-                            #bpm_valid = True
-                            #last_valid_bpm_ms = time.ticks_ms()
-
-                            #print("BPM filtrado =", bpm)
-
-                        #else:
-                            #No se sustituye el BPM estable por una lectura anómala
-                            #bpm_valid = True
-
-                            #print(
-                                #"BPM descartado por salto =", bpm_calc,
-                                #"| se mantiene =", bpm
-                            #)   
-
-                #else:
-                    #Mientras el dedo continúe colocado, conservar el último BPM estable
-                    #if bpm != 0:
-                        #bpm_valid = True
-                        #print("BPM no válido =", bpm_calc, "| se mantiene =", bpm)
-                    #else:
-                        #bpm_valid = False
-                        #print("Todavía no existe un BPM estable")
-
-                pass
+                if PRINT_DEBUG:
+                    print("oxygen BPM =", bpm_calc, "valid =", bv)
                 if sv and (SPO2_MIN <= spo2_calc <= SPO2_MAX):
                     spo2_valid = True
-                    spo2 = push_and_mean(spo2_calc, SPO2_HISTORY, 8)
-                    print("SpO2 válida =", spo2)
+                    spo2 = SPO2_HISTORY.push(spo2_calc)
+                    if PRINT_DEBUG:
+                        print("SpO2 válida =", spo2)
                 else:
                     spo2_valid = False
-                    print("SpO2 descartada =", spo2_calc)
+                    if PRINT_DEBUG:
+                        print("SpO2 descartada =", spo2_calc)
 
                 #warm-up inicial
-                if time.ticks_diff(time.ticks_ms(), finger_since_ms) < WARMUP_MS:
+                if _ticks_diff(now, finger_since_ms) < WARMUP_MS:
                     spo2_valid = False
                     #Durante el calentamiento solo se oculta el BPM si todavía no se ha obtenido uno estable
                     if bpm == 0:
@@ -448,62 +477,95 @@ def read_and_update():
             log("Dedo retirado. Coloque su dedo…")
             if display and display.is_connected():
                 display.display_finger_message()
-            #Avisar a la interfaz web de que se ha retirado el dedo
+            #Avisar a la interfaz web de que se ha retirado el dedo (se envía al final de esta vuelta del bucle)
             if ble.is_connected():
                 try:
-                    ble.send_raw({
+                    ble.queue_raw({
                         "fingerDetected": False
                     })
                 except Exception as e:
-                    log("[BLE] Error enviando estado de dedo retirado:", e)
-        finger_present = False
-        spo2_valid = bpm_valid = False
+                    log("[BLE] Error encolando estado de dedo retirado:", e)
+            finger_present = False
+            finger_threshold = FINGER_ON
+            spo2_valid = bpm_valid = False
+        #sin dedo el estado ya está a cero: la muestra sale sin más escrituras de globales
+        return False, False
 
     return spo2_valid, bpm_valid
 
 def refresh_temperature():
+    #recoge la conversión lanzada en la llamada anterior (hace UI_REFRESH_MS, ya terminada) y
+    #lanza la siguiente: el bucle no espera los ~30 ms de conversión del sensor
+    #(sin try: el driver ya absorbe los errores de I²C y devuelve None si no hay lectura)
     global temp
-    try:
-        raw = float(sensor.readTemperature())
-        corr = raw + TEMP_OFFSET   #offset fijo
-        #EMA + media móvil para estabilizar
-        if not TEMP_HISTORY:
-            temp_ema = corr
-        else:
-            temp_ema = (1-ALPHA_TEMP) * TEMP_HISTORY[-1] + ALPHA_TEMP * corr
-        temp = push_and_mean(temp_ema, TEMP_HISTORY, HISTORY_LEN)
-    except Exception:
-        temp = 0.0
+    raw = sensor.readTemperatureResult()
+    sensor.startTemperature()
+    if raw is None:
+        return
+    corr = raw + TEMP_OFFSET   #offset fijo
+    #EMA + media móvil para estabilizar
+    if len(TEMP_HISTORY) == 0:
+        temp_ema = corr
+    else:
+        last = TEMP_HISTORY.last()
+        temp_ema = last + ALPHA_TEMP * (corr - last) #(1-a)*last + a*corr con un solo producto
+    temp = TEMP_HISTORY.push(temp_ema)
 
 def send_ble(spo2_i, bpm_i, temp_f, label, y):
-    """Envío por BLE con la API existente (formato que espera el server). No tocar BLE."""
+    """Encola la medición por BLE (formato que espera el server); se envía en flush_ble al final de la vuelta.
+    Encolar no toca el stack BLE (los errores de notify se gestionan en flush_ble)."""
     if ble.is_connected():
-        try:
-            ble.send_measurement(
-                temperature=temp_f,
-                bmp=bpm_i,                 #la web/servidor esperan 'bmp'
-                spo2=spo2_i,
-                riskScore=label,           #0/1
-                modelPreccision=y          #score 0...1
-            )
+        ble.queue_measurement(
+            temperature=temp_f,
+            bmp=bpm_i,                 #la web/servidor esperan 'bmp'
+            spo2=spo2_i,
+            riskScore=label,           #0/1
+            modelPreccision=y          #score 0...1
+        )
+        if PRINT_SERIAL: #el f-string solo se construye si se va a imprimir
             log("[BLE] TX ->", f"{spo2_i},{bpm_i},{temp_f:.2f} label={label} y={y:.3f}")
-        except Exception as e:
-            log("[BLE] ERROR notify:", e)
     else:
-        log("[BLE] sin conexión; omitido:", f"{spo2_i},{bpm_i},{temp_f:.2f}")
+        if PRINT_SERIAL:
+            log("[BLE] sin conexión; omitido:", f"{spo2_i},{bpm_i},{temp_f:.2f}")
+
+def flush_ble():
+    """Envía de una vez todas las líneas encoladas (comparten notificaciones hasta MTU-3 bytes)."""
+    #si el envío falla las líneas se descartan igualmente
+    try:
+        ble.flush()
+    except Exception as e:
+        log("[BLE] ERROR notify:", e)
 
 #bucle principal
-try:
+def run_loop():
+    """Bucle principal dentro de una función: los alias y el estado del bucle son variables
+    locales (acceso por índice) en vez de búsquedas en el diccionario de globales."""
+    ticks_ms = time.ticks_ms; ticks_diff = time.ticks_diff
+    _read = read_and_update; _refresh_temp = refresh_temperature; _available = sensor.available
+    _ble_pending = ble.pending
+    _flush_page = display.flush_page if display else None
+
+    last_ui_ms = last_ble_send_ms = last_screen_update_ms = ticks_ms()
+    screen_mode = 0
+    last_risk_label = 0
+    ai_inputs = None #entradas de la última inferencia; predict es determinista, así que
+    ai_result = (0, 0.0) #con las mismas entradas (ya recortadas y redondeadas) se reutiliza
+
     while True:
-        sv, bv = read_and_update()
+        #una ráfaga del FIFO trae varias muestras: se procesan todas antes de pasar al resto del bucle
+        sv, bv = _read()
+        while _available():
+            sv, bv = _read()
 
-        now = time.ticks_ms()
-        if time.ticks_diff(now, last_ui_ms) > UI_REFRESH_MS:
+        now = ticks_ms()
+        if ticks_diff(now, last_ui_ms) > UI_REFRESH_MS:
             last_ui_ms = now
-            refresh_temperature()
+            #la temperatura solo se muestra/envía con dedo: sin dedo no se toca el sensor
+            if finger_present:
+                _refresh_temp()
 
             #mostrar por consola
-            if sv or bv:
+            if PRINT_SERIAL and (sv or bv):
                 log("SpO2:", (int(spo2) if sv else "-"),
                     " BPM:", (("%.1f" % bpm) if bv else "-"),
                     " Temp:", ("%.2f°C" % temp))
@@ -511,7 +573,7 @@ try:
             #OLED
             if display and display.is_connected():
                 try:
-                    if time.ticks_diff(now, last_screen_update_ms) > SCREEN_UPDATE_MS:
+                    if ticks_diff(now, last_screen_update_ms) > SCREEN_UPDATE_MS:
                         #Mostrar valores cuando ya exista al menos una medición
                         if finger_present and spo2 != 0 and bpm != 0:
                             if screen_mode == 0:
@@ -531,20 +593,27 @@ try:
                     print("OLED error:", e)
 
         #usar promedios al enviar
-        if sv and bv and time.ticks_diff(now, last_ble_send_ms) > BLE_SEND_MS:
+        if sv and bv and ticks_diff(now, last_ble_send_ms) > BLE_SEND_MS:
             spo2_use = spo2
-            bpm_use  = push_and_mean(bpm,  BPM_HISTORY, 10)
+            bpm_use  = BPM_HISTORY.push(bpm)
 
-            s_spo2 = int(round(clamp(spo2_use, SPO2_MIN, SPO2_MAX)))
-            s_bpm = int(round(clamp(bpm_use, BPM_MIN, BPM_MAX)))
-            s_temp = float(clamp(temp, 25.0, 45.0))
+            s_spo2 = clamp_i(int(round(spo2_use)), SPO2_MIN, SPO2_MAX)
+            s_bpm = clamp_i(int(round(bpm_use)), BPM_MIN, BPM_MAX)
+            s_temp = clamp(temp, 25.0, 45.0) #temp ya es float (media de TEMP_HISTORY)
 
-            #IA 
-            try:
-                model_label, model_y = predict([s_spo2, s_bpm, s_temp])  # (0/1, 0..1)
-            except Exception as e:
-                log("IA ERROR:", e)
-                model_label, model_y = 0, 0.0 #si falla, pone no riesgo por defecto
+            #IA (solo si cambiaron las entradas): la temperatura entra en décimas de grado;
+            #con el float de la EMA la clave cambiaría en cada envío y nunca se reutilizaría
+            t10 = int(s_temp * 10)
+            inputs = (s_spo2, s_bpm, t10)
+            if ENABLE_IA and inputs != ai_inputs:
+                try:
+                    ai_result = predict([s_spo2, s_bpm, t10 / 10])  # (0/1, 0..1)
+                    ai_inputs = inputs
+                except Exception as e:
+                    log("IA ERROR:", e)
+                    ai_result = (0, 0.0) #si falla, pone no riesgo por defecto
+                    ai_inputs = None
+            model_label, model_y = ai_result
 
             #reglas clínicas (prioritarias sobre la IA, OR lógico)
             rule_label, rule_score, viols = rule_risk(s_spo2, s_bpm, s_temp)
@@ -552,26 +621,35 @@ try:
             if rule_label == 1:
                 final_label = 1
                 final_y = max(model_y, rule_score)  
-                log(f"[RULE] Riesgo por: {','.join(viols)} "
-                    f"(T={s_temp:.2f}°C, BPM={s_bpm}, SpO2={s_spo2}%)")
+                if PRINT_SERIAL: #el f-string y el join solo se construyen si se va a imprimir
+                    log(f"[RULE] Riesgo por: {','.join(viols)} "
+                        f"(T={s_temp:.2f}°C, BPM={s_bpm}, SpO2={s_spo2}%)")
             else:
                 final_label = int(model_label)
-                final_y = float(model_y)
-            
+                final_y = model_y
+        
             last_risk_label = final_label
             send_ble(s_spo2, s_bpm, s_temp, final_label, final_y)
-            last_ble_keepalive_ms = now
             last_ble_send_ms = now
 
-        else:
-            if time.ticks_diff(now, last_ble_keepalive_ms) > BLE_KEEPALIVE_MS: #mantiene un latido temporal
-                last_ble_keepalive_ms = now
+        #OLED: como mucho una página (~3 ms de I²C) por vuelta, no el frame entero de golpe
+        if _flush_page is not None:
+            _flush_page()
+
+        #cola BLE: se vacía en la misma vuelta en que se encola, sin retardo añadido; con una
+        #medición cada BLE_SEND_MS solo se agrupa lo encolado en la misma vuelta (p. ej. el
+        #aviso de dedo retirado junto a la última medición)
+        if _ble_pending():
+            flush_ble()
 
         if stop_flag:
             log("Parada solicitada por botón.")
-            break
+            return
+        #sin espera fija: read_and_update ya espera (cediendo la CPU cada 1 ms en safeCheck) a
+        #que el sensor tenga muestras nuevas, así que el ritmo del bucle lo marca el FIFO
 
-        time.sleep_ms(5) #pequeña espera para no saturar CPU/I2C
+try:
+    run_loop()
 
 except KeyboardInterrupt:
     log("Parada solicitada por Ctrl-C.")
@@ -579,6 +657,7 @@ except KeyboardInterrupt:
 finally:
     try:
         if display and display.is_connected():
+            display.defer_show = False
             display.clear()
             try: display.display_text("Programa detenido")
             except: pass
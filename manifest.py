@@ -0,0 +1,16 @@
+#  @file manifest.py
+#  @brief Manifiesto para congelar las librerías del sensor en el firmware de MicroPython.
+#
+#  Compila con `mpy-cross -O3` los módulos de `lib/max30102` (adquisición FIFO y
+#  cálculo de SpO2) y los incluye en la imagen del firmware, de forma que no se
+#  interpretan desde el sistema de archivos en cada arranque.
+#  @usage
+#    make -C ports/esp32 BOARD=ESP32_GENERIC FROZEN_MANIFEST=/ruta/a/Saude-Remota/manifest.py
+#  @note En `sys.path` el directorio actual va antes que `.frozen` y `/lib` va después: la copia
+#    congelada solo se usa al importar el paquete de nivel superior (`from max30102 import ...`, como
+#    hace `main.py`) y no con `lib.max30102`. Sube el resto con `./upload.sh <PUERTO> --frozen`,
+#    que omite `lib/max30102`.
+
+include("$(PORT_DIR)/boards/manifest.py")
+
+package("max30102", base_path="lib", opt=3)
@@ -5,12 +5,14 @@
 #    1. Verifica que `ampy` esté instalado en el sistema.
 #    2. Comprueba que se haya proporcionado el puerto serie.
 #    3. Elimina recursivamente todo el contenido existente en el sistema de archivos del dispositivo (excepto *boot.py*).
-#    4. Sube todos los archivos *.py* presentes en el directorio actual y sus sub‑carpetas, creando la jerarquía necesaria.
+#    4. Sube todos los archivos *.py* presentes en el directorio actual y sus sub‑carpetas, creando la jerarquía necesaria
+#       (con `--frozen` omite `lib/max30102`, que ya va congelado en el firmware mediante `manifest.py`).
 #    5. Muestra al final un árbol de archivos resultante.
 #  @usage
-#    ./upload.sh <PUERTO_SERIAL>
+#    ./upload.sh <PUERTO_SERIAL> [--frozen]
 #  @example
 #    ./upload.sh /dev/ttyUSB0
+#    ./upload.sh /dev/ttyUSB0 --frozen
 #  @dependencies adafruit‑ampy ≥ 1.1.0 (pip install adafruit‑ampy)
 #  @version 1.0.0
 #  @date 2025‑08‑02
@@ -25,13 +27,20 @@ if ! command -v ampy &> /dev/null; then #comprueba si ampy está instalado y en
 fi
 
 if [ -z "${1-}" ]; then #si no se pasa el puerto serie
-  echo "Uso: $0 <PUERTO_SERIAL>"
+  echo "Uso: $0 <PUERTO_SERIAL> [--frozen]"
   echo "Ejemplo: $0 /dev/ttyUSB0"
   exit 1
 fi
 
 PORT="$1" #guarda el puerto en la variable PORT
 
+#con --frozen no se sube lib/max30102: el firmware ya lo incluye congelado (manifest.py)
+#y una copia en el sistema de archivos solo ocuparía espacio
+FROZEN_PRUNE=()
+if [ "${2-}" = "--frozen" ]; then
+  FROZEN_PRUNE=(-path "./lib/max30102" -prune -o)
+fi
+
 borrar_remoto_recursivo() {
   local path="$1" #ruta a borrar
   local entradas #variable para el listado
@@ -100,6 +109,8 @@ find . \
   -path "./venv" -prune -o \
   -path "./__pycache__" -prune -o \
   -path "./.mypy_cache" -prune -o \
+  -path "./manifest.py" -prune -o \
+  ${FROZEN_PRUNE[@]+"${FROZEN_PRUNE[@]}"} \
   -type f \( -name "*.py" -o -name "*.json" \) -print0 \
 | while IFS= read -r -d '' LOCAL_FILE; do #lee cada ruta de archivo usando separador nulo
     # Quita el prefijo "./"